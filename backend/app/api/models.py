@@ -3,8 +3,12 @@ Pydantic models for API requests/responses
 These should match the TypeScript types in the frontend
 """
 
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional, Literal, Generic, TypeVar
+import numpy as np
+import orjson
+from pydantic import BaseModel, ConfigDict, PrivateAttr, PlainSerializer, PlainValidator, WithJsonSchema
+from typing import List, Dict, Any, Optional, Literal, Generic, TypeVar, Union
+from typing_extensions import Annotated, TypedDict, NotRequired
+from datetime import datetime
 
 T = TypeVar('T')
 
@@ -61,16 +65,46 @@ class GridBounds(BaseModel):
     west: float
 
 
+def _grid_to_json_lists(values: Any) -> List[List[float]]:
+    # Round-trip through orjson so float32 values keep their shortest repr
+    # (tolist() would widen 0.1 to 0.10000000149011612)
+    return orjson.loads(orjson.dumps(np.asarray(values), option=orjson.OPT_SERIALIZE_NUMPY))
+
+
+# 2D float grid held as one contiguous float32 array instead of nested lists
+# of Python floats; still a JSON array of arrays on the wire
+GridValues = Annotated[
+    np.ndarray,
+    PlainValidator(lambda v: np.asarray(v, dtype=np.float32)),
+    PlainSerializer(_grid_to_json_lists, return_type=List[List[float]], when_used="json"),
+    WithJsonSchema({"type": "array", "items": {"type": "array", "items": {"type": "number"}}}),
+]
+
+
 class GridData(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     resolution: float  # meters per pixel
     bounds: GridBounds
-    values: List[List[float]]  # 2D array (64x64 for MVP)
+    values: GridValues  # 2D array (64x64 for MVP)
+
+
+# Compact grid encoding: row-major little-endian values, base64 encoded
+# (served instead of GridData when the client accepts application/x-ndvi-binary)
+class EncodedGridData(BaseModel):
+    resolution: float  # meters per pixel
+    bounds: GridBounds
+    dtype: Literal["float16"]
+    shape: List[int]  # [rows, cols]
+    values_b64: str
 
 
 class NDVIGrid(BaseModel):
     fieldId: str
     timestamp: str
-    grid: GridData
+    grid: Union[GridData, EncodedGridData]
+    # Set on mock fallback grids (not serialized) so they aren't cached
+    _is_mock: bool = PrivateAttr(default=False)
 
 
 # Stress Index
@@ -91,20 +125,94 @@ class SoilMoistureData(TimeSeriesData):
     depth: Optional[float] = None  # cm
 
 
-class YieldPredictionData(TimeSeriesData):
+# Computed timeline points are TypedDicts, not models: calculators build
+# dozens per request from trusted values, so each point is a plain dict
+class _TimeSeriesPoint(TypedDict):
+    timestamp: str
+    value: float
+
+
+class YieldPredictionData(_TimeSeriesPoint):
     fieldId: str
-    confidence: Optional[float] = None  # 0-1
+    confidence: NotRequired[Optional[float]]  # 0-1
 
 
-class CarbonMetricsData(TimeSeriesData):
+class CarbonMetricsData(_TimeSeriesPoint):
     fieldId: str
     metricType: Literal["sequestration", "emission", "net"]
 
 
 # API Response wrapper
-class APIResponse(BaseModel, Generic[T]):
+# A TypedDict rather than a model: it only describes the envelope shape for
+# response_model/OpenAPI, so building one is a plain dict with no validation
+class APIResponse(TypedDict, Generic[T]):
     data: T
     timestamp: str
     status: Literal["success", "error"]
-    message: Optional[str] = None
+    message: NotRequired[Optional[str]]
+
+
+# Concrete envelopes used as route response_models: one plain class per payload
+# instead of a new APIResponse[T] specialization per route
+class _Envelope(TypedDict):
+    timestamp: str
+    status: Literal["success", "error"]
+    message: NotRequired[Optional[str]]
+
+
+class FarmListResponse(_Envelope):
+    data: List[Farm]
+
+
+class FarmResponse(_Envelope):
+    data: Farm
+
+
+class CropListResponse(_Envelope):
+    data: List[Crop]
+
+
+class CropResponse(_Envelope):
+    data: Crop
+
+
+class FieldBoundaryListResponse(_Envelope):
+    data: List[FieldBoundary]
+
+
+class KPISummaryResponse(_Envelope):
+    data: KPISummary
+
+
+class NDVIGridResponse(_Envelope):
+    data: NDVIGrid
+
+
+class StressIndexResponse(_Envelope):
+    data: StressIndex
+
+
+class TimeSeriesListResponse(_Envelope):
+    data: List[TimeSeriesData]
+
+
+class SoilMoistureListResponse(_Envelope):
+    data: List[SoilMoistureData]
+
+
+class YieldPredictionListResponse(_Envelope):
+    data: List[YieldPredictionData]
+
+
+class CarbonMetricsListResponse(_Envelope):
+    data: List[CarbonMetricsData]
+
+
+def api_ok(data: Any, timestamp: Optional[str] = None) -> Dict[str, Any]:
+    """Build a success response envelope around data"""
+    return {
+        "data": data,
+        "timestamp": timestamp or datetime.now().isoformat(),
+        "status": "success"
+    }
 
@@ -0,0 +1,92 @@
+"""
+Response classes shared by the API
+"""
+
+import hashlib
+from datetime import date
+from decimal import Decimal
+from typing import Any, NamedTuple
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+# Try to import numpy, grids are plain lists without it
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+def orjson_default(obj: Any) -> Any:
+    """
+    orjson fallback for types it can't serialize natively
+    (pydantic models, Decimal, numpy scalars; date is handled natively)
+    """
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if HAS_NUMPY and isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class APIJSONResponse(ORJSONResponse):
+    """
+    ORJSONResponse that also serializes pydantic models, Decimal and numpy values
+    Used as the app's default_response_class
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=orjson_default, option=_ORJSON_OPTIONS)
+
+
+# Static payloads (farms, crops, fields) may be cached briefly by clients
+STATIC_CACHE_CONTROL = "public, max-age=60"
+
+
+class StaticBody(NamedTuple):
+    """Pre-serialized JSON body with its strong ETag"""
+    content: bytes
+    etag: str
+
+
+def static_body(content: bytes) -> StaticBody:
+    """Wrap pre-serialized bytes with a SHA-1 ETag computed once"""
+    return StaticBody(content, f'"{hashlib.sha1(content).hexdigest()}"')
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names etag"""
+    if_none_match = request.headers.get("if-none-match")
+    return bool(if_none_match) and (
+        if_none_match == etag
+        or etag in (tag.strip() for tag in if_none_match.split(","))
+    )
+
+
+def data_etag(data: Any) -> str:
+    """
+    Strong ETag over the serialized data, so it changes whenever the rows do
+    (the envelope's per-request timestamp is deliberately left out)
+    """
+    content = orjson.dumps(data, default=orjson_default, option=_ORJSON_OPTIONS)
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def static_json_response(request: Request, body: StaticBody) -> Response:
+    """
+    Serve a static body, or an empty 304 when the client already has it
+    """
+    headers = {"ETag": body.etag, "Cache-Control": STATIC_CACHE_CONTROL}
+    if etag_matches(request, body.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body.content, media_type="application/json", headers=headers)
@@ -2,22 +2,26 @@
 Carbon metrics endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from app.api.models import CarbonMetricsData, APIResponse
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.api.responses import APIJSONResponse
+from app.api.models import api_ok, CarbonMetricsListResponse
 from app.services.carbon_calculator import calculate_carbon_metrics
+from app.utils.log_throttle import get_throttled_logger
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import date
 
 router = APIRouter()
+logger = get_throttled_logger(__name__)
 
 
-@router.get("/carbon-metrics/{field_id}", response_model=APIResponse[List[CarbonMetricsData]])
+@router.get("/carbon-metrics/{field_id}", response_model=CarbonMetricsListResponse)
 async def get_carbon_metrics(
+    request: Request,
     field_id: str,
     lat: Optional[float] = Query(None, description="Latitude"),
     lng: Optional[float] = Query(None, description="Longitude"),
-    date_start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
-    date_end: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+    date_start: Optional[date] = Query(None, description="Start date (YYYY-MM-DD)"),
+    date_end: Optional[date] = Query(None, description="End date (YYYY-MM-DD)")
 ):
     """
     Get carbon metrics data for a field
@@ -46,13 +50,10 @@ async def get_carbon_metrics(
             date_end=date_end
         )
         
-        return APIResponse(
-            data=carbon_data,
-            timestamp=datetime.now().isoformat(),
-            status="success"
-        )
+        # Rows are plain dicts from trusted service output;
+        # returning a Response directly skips response_model revalidation
+        return APIJSONResponse(api_ok(carbon_data, timestamp=request.state.ts))
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("carbon metrics failed", extra={"field_id": field_id})
         raise HTTPException(status_code=500, detail=str(e))
 
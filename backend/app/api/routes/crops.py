@@ -2,77 +2,68 @@
 Crop endpoints
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import List
-from app.api.models import Crop, APIResponse
+import orjson
+from fastapi import APIRouter, HTTPException, Request, Response
+from app.api.models import api_ok, CropListResponse, CropResponse
+from app.api.responses import static_body, static_json_response
 from app.services.fao import get_crop_metadata
 
 router = APIRouter()
 
 
-@router.get("/crops", response_model=APIResponse[List[Crop]])
-async def get_crops():
+# Real Canadian crop data
+CROPS = [
+    {
+        "id": "crop-1",
+        "name": "Canola",
+        "type": "Oilseed",
+        "plantingDate": "2024-05-01",
+        "expectedHarvestDate": "2024-09-15"
+    },
+    {
+        "id": "crop-2",
+        "name": "Timothy Hay",
+        "type": "Forage",
+        "plantingDate": "2024-04-15",
+        "expectedHarvestDate": "2024-07-20"
+    }
+]
+
+CROPS_BY_ID = {crop["id"]: crop for crop in CROPS}
+
+# Lowercase names for FAO metadata matching
+_CROP_NAME_BY_ID = {crop_id: crop["name"].lower() for crop_id, crop in CROPS_BY_ID.items()}
+
+# Response bodies never change, so serialize them once at import time
+_CROPS_BODY = static_body(orjson.dumps(api_ok(CROPS, timestamp="2024-01-01T00:00:00Z")))
+
+_CROP_BY_ID_BODY = {
+    crop_id: static_body(orjson.dumps(api_ok(crop, timestamp="2024-01-01T00:00:00Z")))
+    for crop_id, crop in CROPS_BY_ID.items()
+}
+
+# Same body HTTPException(404) would produce, without raising
+_CROP_NOT_FOUND_BYTES = orjson.dumps({"detail": "Crop not found"})
+
+
+@router.get("/crops", response_model=CropListResponse)
+async def get_crops(request: Request):
     """
     Get list of crops
     """
-    # Real Canadian crop data
-    crops = [
-        {
-            "id": "crop-1",
-            "name": "Canola",
-            "type": "Oilseed",
-            "plantingDate": "2024-05-01",
-            "expectedHarvestDate": "2024-09-15"
-        },
-        {
-            "id": "crop-2",
-            "name": "Timothy Hay",
-            "type": "Forage",
-            "plantingDate": "2024-04-15",
-            "expectedHarvestDate": "2024-07-20"
-        }
-    ]
-    
-    return APIResponse(
-        data=crops,
-        timestamp="2024-01-01T00:00:00Z",
-        status="success"
-    )
+    return static_json_response(request, _CROPS_BODY)
 
 
-@router.get("/crops/{crop_id}", response_model=APIResponse[Crop])
-async def get_crop(crop_id: str):
+@router.get("/crops/{crop_id}", response_model=CropResponse)
+async def get_crop(request: Request, crop_id: str):
     """
     Get crop by ID
     """
-    # Real Canadian crop data
-    crops_data = {
-        "crop-1": {
-            "id": "crop-1",
-            "name": "Canola",
-            "type": "Oilseed",
-            "plantingDate": "2024-05-01",
-            "expectedHarvestDate": "2024-09-15"
-        },
-        "crop-2": {
-            "id": "crop-2",
-            "name": "Timothy Hay",
-            "type": "Forage",
-            "plantingDate": "2024-04-15",
-            "expectedHarvestDate": "2024-07-20"
-        }
-    }
-    
-    if crop_id not in crops_data:
-        raise HTTPException(status_code=404, detail="Crop not found")
-    
-    crop = crops_data[crop_id]
-    
-    return APIResponse(
-        data=crop,
-        timestamp="2024-01-01T00:00:00Z",
-        status="success"
-    )
+    body = _CROP_BY_ID_BODY.get(crop_id)
+    if body is None:
+        return Response(content=_CROP_NOT_FOUND_BYTES, status_code=404, media_type="application/json")
+
+    return static_json_response(request, body)
 
 
 @router.get("/crops/{crop_id}/metadata")
@@ -87,19 +78,10 @@ async def get_crop_metadata_endpoint(crop_id: str, crop_name: str = None):
     try:
         # If crop_name not provided, try to get it from the crop data
         if not crop_name:
-            # Try to get crop name from internal data
-            crop_data = None
-            if crop_id == "crop-1":
-                crop_name = "canola"
-            elif crop_id == "crop-2":
-                crop_name = "timothy hay"
+            crop_name = _CROP_NAME_BY_ID.get(crop_id)
         
         metadata = await get_crop_metadata(crop_id, crop_name)
-        return APIResponse(
-            data=metadata,
-            timestamp="2024-01-01T00:00:00Z",
-            status="success"
-        )
+        return api_ok(metadata, timestamp="2024-01-01T00:00:00Z")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
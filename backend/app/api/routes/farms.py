@@ -2,75 +2,62 @@
 Farm endpoints
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import List
-from app.api.models import Farm, APIResponse
+import orjson
+from fastapi import APIRouter, Request, Response
+from app.api.models import api_ok, FarmListResponse, FarmResponse
+from app.api.responses import static_body, static_json_response
 
 router = APIRouter()
 
 
-@router.get("/farms", response_model=APIResponse[List[Farm]])
-async def get_farms():
+# Real Canadian farm data
+FARMS = [
+    {
+        "id": "farm-1",
+        "name": "Hartland Colony",
+        "location": {"lat": 52.619167, "lng": -113.092639},  # 52°37'09.0"N, 113°05'33.5"W
+        "area": 250.5,
+        "defaultCropId": "crop-1"  # Canola
+    },
+    {
+        "id": "farm-2",
+        "name": "Exceedagro Reference Field",
+        "location": {"lat": 54.0167, "lng": -124.0167},  # Vanderhoof, BC
+        "area": 180.3,
+        "defaultCropId": "crop-2"  # Timothy Hay
+    }
+]
+
+FARMS_BY_ID = {farm["id"]: farm for farm in FARMS}
+
+# Response bodies never change, so serialize them once at import time
+_FARMS_BODY = static_body(orjson.dumps(api_ok(FARMS, timestamp="2024-01-01T00:00:00Z")))
+
+_FARM_BY_ID_BODY = {
+    farm_id: static_body(orjson.dumps(api_ok(farm, timestamp="2024-01-01T00:00:00Z")))
+    for farm_id, farm in FARMS_BY_ID.items()
+}
+
+# Same body HTTPException(404) would produce, without raising
+_FARM_NOT_FOUND_BYTES = orjson.dumps({"detail": "Farm not found"})
+
+
+@router.get("/farms", response_model=FarmListResponse)
+async def get_farms(request: Request):
     """
     Get list of farms
     For now, returns mock data. Will be replaced with database query.
     """
-    # Real Canadian farm data
-    farms = [
-        {
-            "id": "farm-1",
-            "name": "Hartland Colony",
-            "location": {"lat": 52.619167, "lng": -113.092639},  # 52°37'09.0"N, 113°05'33.5"W
-            "area": 250.5,
-            "defaultCropId": "crop-1"  # Canola
-        },
-        {
-            "id": "farm-2",
-            "name": "Exceedagro Reference Field",
-            "location": {"lat": 54.0167, "lng": -124.0167},  # Vanderhoof, BC
-            "area": 180.3,
-            "defaultCropId": "crop-2"  # Timothy Hay
-        }
-    ]
-    
-    return APIResponse(
-        data=farms,
-        timestamp="2024-01-01T00:00:00Z",
-        status="success"
-    )
+    return static_json_response(request, _FARMS_BODY)
 
 
-@router.get("/farms/{farm_id}", response_model=APIResponse[Farm])
-async def get_farm(farm_id: str):
+@router.get("/farms/{farm_id}", response_model=FarmResponse)
+async def get_farm(request: Request, farm_id: str):
     """
     Get farm by ID
     """
-    # Real Canadian farm data
-    farms_data = {
-        "farm-1": {
-            "id": "farm-1",
-            "name": "Hartland Colony",
-            "location": {"lat": 52.619167, "lng": -113.092639},
-            "area": 250.5,
-            "defaultCropId": "crop-1"  # Canola
-        },
-        "farm-2": {
-            "id": "farm-2",
-            "name": "Exceedagro Reference Field",
-            "location": {"lat": 54.0167, "lng": -124.0167},
-            "area": 180.3,
-            "defaultCropId": "crop-2"  # Timothy Hay
-        }
-    }
-    
-    if farm_id not in farms_data:
-        raise HTTPException(status_code=404, detail="Farm not found")
-    
-    farm = farms_data[farm_id]
-    
-    return APIResponse(
-        data=farm,
-        timestamp="2024-01-01T00:00:00Z",
-        status="success"
-    )
+    body = _FARM_BY_ID_BODY.get(farm_id)
+    if body is None:
+        return Response(content=_FARM_NOT_FOUND_BYTES, status_code=404, media_type="application/json")
 
+    return static_json_response(request, body)
@@ -2,107 +2,83 @@
 Field boundary endpoints
 """
 
-from fastapi import APIRouter, HTTPException, UploadFile, File
+import orjson
+from fastapi import APIRouter, UploadFile, File, Request
 from typing import List
-from app.api.models import FieldBoundary, APIResponse
-from app.services.geometry_service import get_field_geometry_by_id, get_farm_anchor, make_bbox_polygon
+from app.api.models import FieldBoundary, FieldBoundaryProperties, api_ok, FieldBoundaryListResponse
+from app.api.responses import static_body, static_json_response
+from app.services.geometry_service import get_field_geometry_by_id
 
 router = APIRouter()
 
 
-@router.get("/fields", response_model=APIResponse[List[FieldBoundary]])
-async def get_fields(farm_id: str, crop_id: str):
+# Real field data based on farm and crop
+# Farm 1: Hartland Colony (Alberta) - Canola
+# Farm 2: Exceedagro Reference Field (BC) - Timothy Hay
+# (farm_id, crop_id) -> [(field_id, area, cropType)]
+FIELDS_BY_FARM_CROP = {
+    ("farm-1", "crop-1"): [
+        ("field-1", 25.5, "Canola"),
+        ("field-2", 30.2, "Canola"),
+    ],
+    ("farm-2", "crop-2"): [
+        ("field-3", 18.7, "Timothy Hay"),
+        ("field-4", 22.3, "Timothy Hay"),
+    ],
+}
+
+# Geometry comes from the geometry service (single source of truth); look it up once
+_FIELD_GEOMETRY = {
+    field_id: get_field_geometry_by_id(field_id)
+    for field_list in FIELDS_BY_FARM_CROP.values()
+    for field_id, _, _ in field_list
+}
+
+
+def _build_fields(farm_id: str, crop_id: str) -> List[FieldBoundary]:
+    """
+    Build field boundaries for a farm and crop
+    Static trusted data, so models are constructed without validation
+    """
+    return [
+        FieldBoundary.model_construct(
+            id=field_id,
+            farmId=farm_id,
+            cropId=crop_id,
+            geometry=_FIELD_GEOMETRY[field_id],
+            properties=FieldBoundaryProperties.model_construct(area=area, cropType=crop_type)
+        )
+        for field_id, area, crop_type in FIELDS_BY_FARM_CROP.get((farm_id, crop_id), [])
+    ]
+
+
+def _serialize_fields(fields: List[FieldBoundary]) -> bytes:
+    """Serialize the field list response body"""
+    return orjson.dumps(api_ok([field.model_dump() for field in fields], timestamp="2024-01-01T00:00:00Z"))
+
+
+# Field boundaries are static: build the models and their response bodies once
+FIELD_BOUNDARIES_BY_FARM_CROP = {
+    farm_crop: _build_fields(*farm_crop)
+    for farm_crop in FIELDS_BY_FARM_CROP
+}
+
+_FIELDS_BODY_BY_FARM_CROP = {
+    farm_crop: static_body(_serialize_fields(fields))
+    for farm_crop, fields in FIELD_BOUNDARIES_BY_FARM_CROP.items()
+}
+
+# Unknown farm/crop combinations have no fields
+_EMPTY_BODY = static_body(orjson.dumps(api_ok([], timestamp="2024-01-01T00:00:00Z")))
+
+
+@router.get("/fields", response_model=FieldBoundaryListResponse)
+async def get_fields(request: Request, farm_id: str, crop_id: str):
     """
     Get field boundaries for a farm and crop
     Always returns geometry for each field (single source of truth)
     """
-    # Real field data based on farm and crop
-    # Farm 1: Hartland Colony (Alberta) - Canola
-    # Farm 2: Exceedagro Reference Field (BC) - Timothy Hay
-    
-    fields = []
-    
-    if farm_id == "farm-1" and crop_id == "crop-1":
-        # Hartland Colony - Canola fields
-        # Use geometry service to ensure consistency
-        field1_geometry = get_field_geometry_by_id("field-1")
-        field2_geometry = get_field_geometry_by_id("field-2")
-        
-        fields = [
-            {
-                "id": "field-1",
-                "farmId": farm_id,
-                "cropId": crop_id,
-                "geometry": field1_geometry,
-                "properties": {
-                    "area": 25.5,
-                    "cropType": "Canola"
-                }
-            },
-            {
-                "id": "field-2",
-                "farmId": farm_id,
-                "cropId": crop_id,
-                "geometry": field2_geometry,
-                "properties": {
-                    "area": 30.2,
-                    "cropType": "Canola"
-                }
-            }
-        ]
-    elif farm_id == "farm-2" and crop_id == "crop-2":
-        # Exceedagro Reference Field - Timothy Hay fields
-        # Use geometry service to ensure consistency
-        field3_geometry = get_field_geometry_by_id("field-3")
-        field4_geometry = get_field_geometry_by_id("field-4")
-        
-        fields = [
-            {
-                "id": "field-3",
-                "farmId": farm_id,
-                "cropId": crop_id,
-                "geometry": field3_geometry,
-                "properties": {
-                    "area": 18.7,
-                    "cropType": "Timothy Hay"
-                }
-            },
-            {
-                "id": "field-4",
-                "farmId": farm_id,
-                "cropId": crop_id,
-                "geometry": field4_geometry,
-                "properties": {
-                    "area": 22.3,
-                    "cropType": "Timothy Hay"
-                }
-            }
-        ]
-    else:
-        # For unknown farm/crop combinations, return empty array
-        # In the future, this could generate estimated fields using make_bbox_polygon
-        # For now, only show hardcoded sample data:
-        # - farm-1 (AB) + crop-1 (Canola) → field-1, field-2
-        # - farm-2 (BC) + crop-2 (Timothy Hay) → field-3, field-4
-        fields = []
-    
-    # Ensure all fields have geometry (safety check)
-    for field in fields:
-        if not field.get("geometry"):
-            # Fallback: create estimated polygon from farm anchor
-            try:
-                lat, lng = get_farm_anchor(farm_id)
-                field["geometry"] = make_bbox_polygon(lat, lng, delta_deg=0.005)
-            except ValueError:
-                # If farm_id is unknown, use farm-1 as default
-                lat, lng = get_farm_anchor("farm-1")
-                field["geometry"] = make_bbox_polygon(lat, lng, delta_deg=0.005)
-    
-    return APIResponse(
-        data=fields,
-        timestamp="2024-01-01T00:00:00Z",
-        status="success"
-    )
+    return static_json_response(request, _FIELDS_BODY_BY_FARM_CROP.get((farm_id, crop_id), _EMPTY_BODY))
 
 
 @router.post("/fields/upload")
@@ -2,13 +2,31 @@
 NDVI/EVI endpoints
 """
 
-from fastapi import APIRouter, HTTPException
-from app.api.models import NDVIGrid, APIResponse, TimeSeriesData
+import asyncio
+import base64
+from datetime import datetime, timedelta
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request, Response
+from app.api.models import NDVIGrid, GridData, GridBounds, EncodedGridData, APIResponse, api_ok, NDVIGridResponse, TimeSeriesListResponse
+from app.api.responses import APIJSONResponse
+from app.services.geometry_service import get_field_geometry_with_fallback, get_field_bbox
 from app.services.sentinel2 import calculate_ndvi, get_ndvi_timeline
+from app.services.precompute import get_precomputed_bytes, store_precomputed_bytes
+from app.utils.inflight import compute_once
+from app.utils.log_throttle import get_throttled_logger
+from app.utils.ndvi_kernels import block_mean_skip_zero, rasterize_field_mask
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import Any, Dict, List
 
 router = APIRouter()
+logger = get_throttled_logger(__name__)
+
+# Opt-in compact grid encoding (see EncodedGridData)
+NDVI_BINARY_MEDIA_TYPE = "application/x-ndvi-binary"
+_VARY_ACCEPT = {"Vary": "Accept"}
+
+# Grid computations in flight, keyed like the grid cache
+_inflight: Dict[str, "asyncio.Future[bytes]"] = {}
 
 
 class NDVICalculationRequest(BaseModel):
@@ -18,7 +36,7 @@ class NDVICalculationRequest(BaseModel):
     date_end: str
 
 
-@router.post("/ndvi/calculate", response_model=APIResponse[NDVIGrid])
+@router.post("/ndvi/calculate", response_model=NDVIGridResponse)
 async def calculate_ndvi_endpoint(request: NDVICalculationRequest):
     """
     Calculate NDVI for a field polygon and date range
@@ -30,16 +48,13 @@ async def calculate_ndvi_endpoint(request: NDVICalculationRequest):
             date_start=request.date_start,
             date_end=request.date_end
         )
-        return APIResponse(
-            data=ndvi_grid,
-            timestamp="2024-01-01T00:00:00Z",
-            status="success"
-        )
+        # Grid is trusted service output; skip response_model revalidation
+        return APIJSONResponse(api_ok(ndvi_grid, timestamp="2024-01-01T00:00:00Z"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/ndvi/{field_id}/timeline", response_model=APIResponse[List[TimeSeriesData]])
+@router.get("/ndvi/{field_id}/timeline", response_model=TimeSeriesListResponse)
 async def get_ndvi_timeline_endpoint(
     field_id: str,
     date_start: str = None,
@@ -63,11 +78,113 @@ async def get_ndvi_timeline_endpoint(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/ndvi/{field_id}/grid", response_model=APIResponse[NDVIGrid])
-async def get_ndvi_grid_endpoint(field_id: str, date: str = None):
+async def _compute_ndvi_grid_body(
+    field_id: str,
+    date_start: str,
+    date_end: str,
+    binary: bool,
+    cache_key: str
+) -> bytes:
+    """
+    Compute, cache and return the serialized NDVI grid envelope for a field
+    """
+    # Step 1: Get field geometry from shared geometry service (single source of truth)
+    # This ensures NDVI uses the exact same geometry as the boundaries endpoint
+    field_geometry = get_field_geometry_with_fallback(field_id)
+    
+    if not field_geometry:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Field geometry not found for field_id: {field_id}"
+        )
+    
+    # Step 2: Calculate bbox from geometry (memoized per field_id)
+    if field_geometry.get("type") != "Polygon" or not field_geometry.get("coordinates"):
+        raise HTTPException(status_code=400, detail="Invalid field geometry")
+    
+    north, south, east, west = get_field_bbox(field_id)
+    bbox = GridBounds.model_construct(north=north, south=south, east=east, west=west)
+    
+    # Rasterize the field polygon onto the 64x64 output grid once here, so
+    # calculate_ndvi can skip its per-geometry polygon masking
+    field_mask = rasterize_field_mask(field_geometry, north, south, east, west)
+    
+    # Step 3-7: Calculate NDVI (using existing calculate_ndvi function)
+    # Call calculate_ndvi which handles:
+    # - Sentinel-2 product search (with cloud filter)
+    # - Download and processing
+    # - Polygon masking
+    # - NDVI calculation
+    ndvi_result = await calculate_ndvi(
+        field_id=field_id,
+        geometry=field_geometry,
+        date_start=date_start,
+        date_end=date_end,
+        precomputed_mask=field_mask
+    )
+    
+    # Step 7: Downsample to 64x64 if needed (grids from calculate_ndvi
+    # are already 64x64 float32 arrays, so this is normally a no-op)
+    grid_values = np.asarray(ndvi_result.grid.values, dtype=np.float32)
+    
+    target_size = 64
+    
+    if grid_values.shape != (target_size, target_size) and grid_values.size > 0:
+        # Block averaging over non-zero (unmasked) pixels
+        grid_values = block_mean_skip_zero(grid_values, target_size)
+    
+    # Calculate statistics on the grid array directly (no Python flatten)
+    if grid_values.size:
+        stats = {
+            "mean": float(grid_values.mean()),
+            "median": float(np.median(grid_values)),
+            "min": float(grid_values.min()),
+            "max": float(grid_values.max())
+        }
+    else:
+        stats = {"mean": 0.0, "median": 0.0, "min": 0.0, "max": 0.0}
+    
+    # Create grid response (values computed above, so skip validation)
+    if binary:
+        # NDVI is bounded in [-1, 1], so float16 precision is ample
+        values_f16 = grid_values.astype("<f2")
+        grid = EncodedGridData.model_construct(
+            resolution=ndvi_result.grid.resolution,
+            bounds=bbox,
+            dtype="float16",
+            shape=list(values_f16.shape),
+            values_b64=base64.b64encode(values_f16.tobytes()).decode("ascii")
+        )
+    else:
+        grid = GridData.model_construct(
+            resolution=ndvi_result.grid.resolution,
+            bounds=bbox,
+            values=grid_values
+        )
+    
+    # One timestamp for both the grid and the envelope
+    timestamp = datetime.now().isoformat()
+    ndvi_grid = NDVIGrid.model_construct(
+        fieldId=field_id,
+        timestamp=timestamp,
+        grid=grid
+    )
+    
+    body = APIJSONResponse(api_ok(ndvi_grid, timestamp=timestamp)).body
+    # Mock grids are random; serve them but keep them out of the 120h cache
+    if not ndvi_result._is_mock:
+        store_precomputed_bytes("ndvi_grid", cache_key, body)
+    return body
+
+
+@router.get("/ndvi/{field_id}/grid", response_model=NDVIGridResponse)
+async def get_ndvi_grid_endpoint(request: Request, field_id: str, date: str = None):
     """
     Get NDVI grid for a field (latest available or specific date)
     
+    Clients sending Accept: application/x-ndvi-binary get the grid as an
+    EncodedGridData (base64 float16, ~4x smaller) instead of nested lists.
+    
     Implementation:
     1. Get field geometry from field_id
     2. Calculate bbox from geometry
@@ -79,134 +196,36 @@ async def get_ndvi_grid_endpoint(field_id: str, date: str = None):
     8. Return grid JSON with stats
     """
     try:
-        from datetime import datetime, timedelta
-        from app.services.sentinel2 import calculate_ndvi
-        from app.api.models import GridData, GridBounds
-        from app.services.geometry_service import get_field_geometry_with_fallback
-        import numpy as np
-        
-        # Step 1: Get field geometry from shared geometry service (single source of truth)
-        # This ensures NDVI uses the exact same geometry as the boundaries endpoint
-        field_geometry = get_field_geometry_with_fallback(field_id)
-        
-        if not field_geometry:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Field geometry not found for field_id: {field_id}"
-            )
-        
-        # Step 2: Calculate bbox from geometry
-        if field_geometry.get("type") == "Polygon" and field_geometry.get("coordinates"):
-            coords = field_geometry["coordinates"][0]  # First ring
-            lngs = [c[0] for c in coords]
-            lats = [c[1] for c in coords]
-            bbox = GridBounds(
-                north=max(lats),
-                south=min(lats),
-                east=max(lngs),
-                west=min(lngs)
-            )
-        else:
-            raise HTTPException(status_code=400, detail="Invalid field geometry")
-        
-        # Step 3-7: Calculate NDVI (using existing calculate_ndvi function)
         # Use recent date range (last 30 days) if date not specified
         if date:
-            date_start = date
-            date_end = date
+            # Only well-formed dates reach the cache key (and its file name)
+            try:
+                date_start = datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+            date_end = date_start
         else:
             end_date = datetime.now()
             date_end = end_date.strftime("%Y-%m-%d")
             date_start = (end_date - timedelta(days=30)).strftime("%Y-%m-%d")
         
-        # Call calculate_ndvi which handles:
-        # - Sentinel-2 product search (with cloud filter)
-        # - Download and processing
-        # - Polygon masking
-        # - NDVI calculation
-        ndvi_result = await calculate_ndvi(
-            field_id=field_id,
-            geometry=field_geometry,
-            date_start=date_start,
-            date_end=date_end
-        )
-        
-        # Step 7: Downsample to 64x64 if needed
-        grid_values = ndvi_result.grid.values
-        current_height = len(grid_values)
-        current_width = len(grid_values[0]) if current_height > 0 else 0
+        # Serve a cached grid for this field and date range if one is still valid;
+        # Sentinel-2 search/download dominates the cost of a miss
+        binary = NDVI_BINARY_MEDIA_TYPE in request.headers.get("accept", "")
+        cache_key = f"{field_id}_{date_start}_{date_end}" + ("_f16" if binary else "")
+        cached = get_precomputed_bytes("ndvi_grid", cache_key)
+        if cached:
+            return Response(content=cached, media_type="application/json", headers=_VARY_ACCEPT)
         
-        target_size = 64
-        
-        if current_height != target_size or current_width != target_size:
-            # Downsample using numpy if available
-            try:
-                grid_array = np.array(grid_values, dtype=np.float32)
-                if grid_array.size > 0:
-                    # Simple block averaging downsampling (no scipy dependency)
-                    step_y = max(1, current_height // target_size)
-                    step_x = max(1, current_width // target_size)
-                    
-                    new_grid = np.zeros((target_size, target_size), dtype=np.float32)
-                    for i in range(target_size):
-                        for j in range(target_size):
-                            y_start = min(i * step_y, current_height - 1)
-                            y_end = min((i + 1) * step_y, current_height)
-                            x_start = min(j * step_x, current_width - 1)
-                            x_end = min((j + 1) * step_x, current_width)
-                            
-                            block = grid_array[y_start:y_end, x_start:x_end]
-                            valid_values = block[block != 0]  # Exclude masked values
-                            if len(valid_values) > 0:
-                                new_grid[i, j] = float(np.mean(valid_values))
-                            else:
-                                new_grid[i, j] = 0.0
-                    
-                    grid_values = new_grid.tolist()
-            except (ImportError, AttributeError):
-                # Fallback: Simple downsampling without scipy
-                step_y = max(1, current_height // target_size)
-                step_x = max(1, current_width // target_size)
-                grid_values = [
-                    [grid_values[i * step_y][j * step_x] 
-                     for j in range(0, current_width, step_x)][:target_size]
-                    for i in range(0, current_height, step_y)
-                ][:target_size]
-        
-        # Calculate statistics
-        all_values = [val for row in grid_values for val in row if val is not None]
-        if all_values:
-            stats = {
-                "mean": float(np.mean(all_values)) if hasattr(np, 'mean') else sum(all_values) / len(all_values),
-                "median": float(np.median(all_values)) if hasattr(np, 'median') else sorted(all_values)[len(all_values) // 2],
-                "min": float(min(all_values)),
-                "max": float(max(all_values))
-            }
-        else:
-            stats = {"mean": 0.0, "median": 0.0, "min": 0.0, "max": 0.0}
-        
-        # Create grid response
-        grid = GridData(
-            resolution=ndvi_result.grid.resolution,
-            bounds=bbox,
-            values=grid_values
-        )
-        
-        ndvi_grid = NDVIGrid(
-            fieldId=field_id,
-            timestamp=datetime.now().isoformat(),
-            grid=grid
-        )
-        
-        return APIResponse(
-            data=ndvi_grid,
-            timestamp=datetime.now().isoformat(),
-            status="success"
+        body = await compute_once(
+            _inflight,
+            cache_key,
+            lambda: _compute_ndvi_grid_body(field_id, date_start, date_end, binary, cache_key)
         )
+        return Response(content=body, media_type="application/json", headers=_VARY_ACCEPT)
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("NDVI grid failed", extra={"field_id": field_id})
         raise HTTPException(status_code=500, detail=f"Error calculating NDVI grid: {str(e)}")
 
@@ -3,16 +3,16 @@ Soil moisture endpoints (Optional for MVP)
 """
 
 from fastapi import APIRouter, HTTPException, Query
-from app.api.models import SoilMoistureData, APIResponse
+from app.api.models import SoilMoistureData, APIResponse, SoilMoistureListResponse
 from app.services.era5land import get_soil_moisture
-from app.services.precompute import get_precomputed_data, precompute_soil_moisture
+from app.services.precompute import get_precomputed_data, precompute_soil_moisture, run_in_background
 from typing import List, Optional
 from datetime import datetime, timedelta
 
 router = APIRouter()
 
 
-@router.get("/soil-moisture/{field_id}", response_model=APIResponse[List[SoilMoistureData]])
+@router.get("/soil-moisture/{field_id}", response_model=SoilMoistureListResponse)
 async def get_soil_moisture_endpoint(
     field_id: str,
     lat: Optional[float] = Query(None, description="Latitude"),
@@ -31,18 +31,17 @@ async def get_soil_moisture_endpoint(
         if lng is None:
             lng = -113.092639
         
+        # Only the default range (no dates given) is precomputed
+        use_precomputed = not date_start and not date_end
+        
         # Default to last 30 days if dates not provided
+        now = datetime.now()
         if not date_end:
-            date_end = datetime.now().strftime("%Y-%m-%d")
+            date_end = now.strftime("%Y-%m-%d")
         if not date_start:
-            date_start = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-        
-        # Try to get precomputed data first (only if using default 30-day range)
-        use_precomputed = (
-            date_start == (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d") and
-            date_end == datetime.now().strftime("%Y-%m-%d")
-        )
+            date_start = (now - timedelta(days=30)).strftime("%Y-%m-%d")
         
+        # Try to get precomputed data first
         if use_precomputed:
             key = f"{field_id}_{lat:.4f}_{lng:.4f}"
             precomputed = get_precomputed_data("soil", key)
@@ -53,7 +52,7 @@ async def get_soil_moisture_endpoint(
                 # Return precomputed data
                 return APIResponse(
                     data=soil_data_list,
-                    timestamp=precomputed.get("computed_at", datetime.now().isoformat()),
+                    timestamp=precomputed.get("computed_at", now.isoformat()),
                     status="success"
                 )
         
@@ -68,15 +67,11 @@ async def get_soil_moisture_endpoint(
         
         # Optionally trigger background precomputation for next time (if using default range)
         if use_precomputed:
-            try:
-                import asyncio
-                asyncio.create_task(precompute_soil_moisture(field_id, lat, lng))
-            except:
-                pass  # Silently fail background precomputation
+            run_in_background(precompute_soil_moisture(field_id, lat, lng))
         
         return APIResponse(
             data=soil_data,
-            timestamp=datetime.now().isoformat(),
+            timestamp=now.isoformat(),
             status="success"
         )
     except Exception as e:
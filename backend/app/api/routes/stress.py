@@ -3,16 +3,64 @@ Stress Index endpoints
 Rule-based stress calculation from NDVI, weather, and soil moisture data
 """
 
+import asyncio
+import re
+from functools import lru_cache
 from fastapi import APIRouter, HTTPException, Query
-from app.api.models import StressIndex, APIResponse, GridData
+from app.api.models import StressIndex, GridData, GridBounds, api_ok, StressIndexResponse
+from app.api.responses import APIJSONResponse
+from app.services.geometry_service import get_field_geometry_with_fallback, get_field_bbox
 from app.services.stress_calculator import calculate_stress_grid
-from typing import Optional
+from app.utils.inflight import compute_once
+from app.utils.log_throttle import get_throttled_logger
+from typing import Any, Dict, Optional, Tuple
 from datetime import datetime
 
 router = APIRouter()
+logger = get_throttled_logger(__name__)
 
+# Crop type guesses from field_id patterns
+_CROP_RE = re.compile(r'crop-(\d+)')
+_FARM_RE = re.compile(r'farm-(\d+)')
 
-@router.get("/stress/{field_id}", response_model=APIResponse[StressIndex])
+# Stress grid computations in flight, keyed by field, location and crop
+_inflight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
+
+@lru_cache(maxsize=1024)
+def _resolve_field(field_id: str) -> Tuple[Tuple[float, float, float, float], float, float, str]:
+    """
+    Resolve a field's bbox, center (lat, lng) and default crop type
+    Field geometry is static, so this is memoized per field_id.
+    """
+    # Get field geometry from shared geometry service (single source of truth)
+    # This ensures Stress uses the exact same geometry as Boundaries and NDVI
+    field_geometry = get_field_geometry_with_fallback(field_id)
+    
+    if not field_geometry or not field_geometry.get("coordinates"):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Field geometry not found for field_id: {field_id}"
+        )
+    
+    north, south, east, west = get_field_bbox(field_id)
+    
+    # Determine crop type from field_id pattern
+    crop_match = _CROP_RE.search(field_id)
+    if crop_match:
+        crop_type = "Canola" if crop_match.group(1) == "1" else "Timothy Hay"
+    else:
+        # Default based on farm location
+        farm_match = _FARM_RE.search(field_id)
+        if farm_match:
+            crop_type = "Canola" if farm_match.group(1) == "1" else "Timothy Hay"
+        else:
+            crop_type = "Canola"  # Default
+    
+    return (north, south, east, west), (north + south) / 2, (east + west) / 2, crop_type
+
+
+@router.get("/stress/{field_id}", response_model=StressIndexResponse)
 async def get_stress_index_endpoint(
     field_id: str,
     lat: Optional[float] = Query(None, description="Latitude"),
@@ -25,79 +73,41 @@ async def get_stress_index_endpoint(
     Calculated from actual NDVI, weather, and soil moisture data
     """
     try:
-        from app.services.geometry_service import get_field_geometry_with_fallback, get_farm_anchor
+        (north, south, east, west), center_lat, center_lng, default_crop_type = _resolve_field(field_id)
         
-        # Get field geometry from shared geometry service (single source of truth)
-        # This ensures Stress uses the exact same geometry as Boundaries and NDVI
-        field_geometry = get_field_geometry_with_fallback(field_id)
-        
-        if not field_geometry or not field_geometry.get("coordinates"):
-            raise HTTPException(
-                status_code=404,
-                detail=f"Field geometry not found for field_id: {field_id}"
-            )
-        
-        # Extract bounds and center from geometry
-        coords = field_geometry["coordinates"][0]  # First ring
-        lngs = [c[0] for c in coords]
-        lats = [c[1] for c in coords]
-        
-        bounds = {
-            "north": max(lats),
-            "south": min(lats),
-            "east": max(lngs),
-            "west": min(lngs)
-        }
-        
-        # Calculate center point
-        field_lat = lat if lat is not None else (max(lats) + min(lats)) / 2
-        field_lng = lng if lng is not None else (max(lngs) + min(lngs)) / 2
-        
-        # Determine crop type from field_id pattern if not provided
-        if not crop_type:
-            import re
-            crop_match = re.search(r'crop-(\d+)', field_id)
-            if crop_match:
-                crop_num = crop_match.group(1)
-                field_crop_type = "Canola" if crop_num == "1" else "Timothy Hay"
-            else:
-                # Default based on farm location
-                farm_match = re.search(r'farm-(\d+)', field_id)
-                if farm_match:
-                    farm_num = farm_match.group(1)
-                    field_crop_type = "Canola" if farm_num == "1" else "Timothy Hay"
-                else:
-                    field_crop_type = "Canola"  # Default
-        else:
-            field_crop_type = crop_type
+        # Query params override the field's center and inferred crop type
+        field_lat = lat if lat is not None else center_lat
+        field_lng = lng if lng is not None else center_lng
+        field_crop_type = crop_type or default_crop_type
         
         # Calculate stress grid from actual data
-        stress_result = await calculate_stress_grid(
-            field_id=field_id,
-            lat=field_lat,
-            lng=field_lng,
-            crop_type=field_crop_type
+        stress_result = await compute_once(
+            _inflight,
+            f"{field_id}|{field_lat:.4f}|{field_lng:.4f}|{field_crop_type}",
+            lambda: calculate_stress_grid(
+                field_id=field_id,
+                lat=field_lat,
+                lng=field_lng,
+                crop_type=field_crop_type
+            )
         )
         
-        grid = GridData(
-            bounds=bounds,
+        # Grid is computed by the stress calculator, so skip validation
+        grid = GridData.model_construct(
+            bounds=GridBounds.model_construct(north=north, south=south, east=east, west=west),
             resolution=0.02,
             values=stress_result["grid"]
         )
         
-        stress_index = StressIndex(
+        now_iso = datetime.now().isoformat()
+        stress_index = StressIndex.model_construct(
             fieldId=field_id,
-            timestamp=datetime.now().isoformat(),
+            timestamp=now_iso,
             grid=grid
         )
         
-        return APIResponse(
-            data=stress_index,
-            timestamp=datetime.now().isoformat(),
-            status="success"
-        )
+        return APIJSONResponse(api_ok(stress_index, timestamp=now_iso))
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("stress index failed", extra={"field_id": field_id})
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -2,17 +2,22 @@
 Weather data endpoints
 """
 
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
-from app.api.models import TimeSeriesData, APIResponse
+from app.api.models import TimeSeriesData, APIResponse, TimeSeriesListResponse
 from app.services.era5 import get_weather_data
-from app.services.precompute import get_precomputed_data, precompute_weather
-from typing import List, Optional
+from app.services.precompute import get_precomputed_data, precompute_weather, run_in_background
+from app.utils.inflight import compute_once
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
 router = APIRouter()
 
+# Weather fetches in flight, keyed by location and date range
+_inflight: Dict[str, "asyncio.Future[List[TimeSeriesData]]"] = {}
 
-@router.get("/weather/{field_id}", response_model=APIResponse[List[TimeSeriesData]])
+
+@router.get("/weather/{field_id}", response_model=TimeSeriesListResponse)
 async def get_weather(
     field_id: str,
     lat: float = Query(..., description="Latitude"),
@@ -25,52 +30,51 @@ async def get_weather(
     Uses precomputed JSON if available, otherwise computes on-demand
     """
     try:
+        # Only the default range (no dates given) is precomputed
+        use_precomputed = not date_start and not date_end
+        
         # Default to last 30 days if dates not provided
+        now = datetime.now()
         if not date_end:
-            date_end = datetime.now().strftime("%Y-%m-%d")
+            date_end = now.strftime("%Y-%m-%d")
         if not date_start:
-            date_start = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-        
-        # Try to get precomputed data first (only if using default 30-day range)
-        use_precomputed = (
-            date_start == (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d") and
-            date_end == datetime.now().strftime("%Y-%m-%d")
-        )
+            date_start = (now - timedelta(days=30)).strftime("%Y-%m-%d")
         
+        # Try to get precomputed data first
         if use_precomputed:
             key = f"{field_id}_{lat:.4f}_{lng:.4f}"
             precomputed = get_precomputed_data("weather", key)
             
             if precomputed and precomputed.get("data"):
                 # Convert dict back to TimeSeriesData objects
-                from app.api.models import TimeSeriesData
                 weather_data_list = [TimeSeriesData(**item) for item in precomputed["data"]]
                 # Return precomputed data
                 return APIResponse(
                     data=weather_data_list,
-                    timestamp=precomputed.get("computed_at", datetime.now().isoformat()),
+                    timestamp=precomputed.get("computed_at", now.isoformat()),
                     status="success"
                 )
         
-        # Fallback to on-demand calculation
-        weather_data = await get_weather_data(
-            lat=lat,
-            lng=lng,
-            date_start=date_start,
-            date_end=date_end
+        # Fallback to on-demand calculation; concurrent polls of a cold
+        # location share one ERA5 fetch
+        weather_data = await compute_once(
+            _inflight,
+            f"{lat:.4f}|{lng:.4f}|{date_start}|{date_end}",
+            lambda: get_weather_data(
+                lat=lat,
+                lng=lng,
+                date_start=date_start,
+                date_end=date_end
+            )
         )
         
         # Optionally trigger background precomputation for next time (if using default range)
         if use_precomputed:
-            try:
-                import asyncio
-                asyncio.create_task(precompute_weather(field_id, lat, lng))
-            except:
-                pass  # Silently fail background precomputation
+            run_in_background(precompute_weather(field_id, lat, lng))
         
         return APIResponse(
             data=weather_data,
-            timestamp=datetime.now().isoformat(),
+            timestamp=now.isoformat(),
             status="success"
         )
     except Exception as e:
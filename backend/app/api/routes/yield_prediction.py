@@ -3,7 +3,7 @@ Yield prediction endpoints
 """
 
 from fastapi import APIRouter, HTTPException, Query
-from app.api.models import YieldPredictionData, APIResponse
+from app.api.models import APIResponse, YieldPredictionListResponse
 from app.services.yield_calculator import calculate_yield_prediction
 from typing import List, Optional
 from datetime import datetime, timedelta
@@ -11,7 +11,7 @@ from datetime import datetime, timedelta
 router = APIRouter()
 
 
-@router.get("/yield-prediction/{field_id}", response_model=APIResponse[List[YieldPredictionData]])
+@router.get("/yield-prediction/{field_id}", response_model=YieldPredictionListResponse)
 async def get_yield_prediction(
     field_id: str,
     lat: Optional[float] = Query(None, description="Latitude"),
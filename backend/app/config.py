@@ -2,6 +2,7 @@
 Application configuration
 """
 
+from functools import cached_property
 from pydantic_settings import BaseSettings
 from typing import List
 
@@ -23,11 +24,14 @@ class Settings(BaseSettings):
     backend_port: int = 8000
     cors_origins: str = "http://localhost:3000"  # Comma-separated list
     
-    @property
+    @cached_property
     def cors_origins_list(self) -> List[str]:
-        """Parse comma-separated CORS origins"""
+        """Parse comma-separated CORS origins (split once, on first access)"""
         return [origin.strip() for origin in self.cors_origins.split(",")]
     
+    # Logging (DEBUG enables per-request cache hit/miss diagnostics)
+    log_level: str = "INFO"
+    
     # Data Cache
     cache_dir: str = "./cache"
     cache_ttl: int = 3600
@@ -3,31 +3,83 @@ Database module for caching API responses
 Uses SQLite for fast local caching
 """
 
+import asyncio
 import sqlite3
-import json
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Tuple
+import orjson
+from pydantic import BaseModel
 from app.config import settings
+from app.utils.log_throttle import get_throttled_logger
 import os
 
+# Try to import zstandard, payloads are stored uncompressed if not available
+try:
+    import zstandard as zstd
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+logger = get_throttled_logger(__name__)
+
 # Database file path
 DB_PATH = os.path.join(settings.cache_dir, "cache.db")
 CACHE_TTL_HOURS = 7 * 24  # Cache data for 7 days (longer cache for better performance)
+CACHE_TTL_SECONDS = CACHE_TTL_HOURS * 3600
+MEMORY_CACHE_MAXSIZE = 512  # Decoded entries kept in-process in front of SQLite
+COORD_DECIMALS = 4  # Cache keys snap lat/lng to ~11m so float noise doesn't miss
+CLEANUP_INTERVAL_SECONDS = CACHE_TTL_SECONDS / 4
+SCHEMA_VERSION = 1  # Stored in PRAGMA user_version once init_db's migrations have run
+VACUUM_PAGES_PER_CLEANUP = 1000  # Free pages returned to the OS per cleanup
+
+
+# One long-lived connection per thread, opened lazily
+_conn_local = threading.local()
+_db_initialized = False
 
 
 def get_db_connection():
-    """Get SQLite database connection"""
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
+    """
+    Get this thread's SQLite connection (opened and tuned on first use)
+    
+    WAL lets readers proceed while a writer commits, and synchronous=NORMAL
+    skips the per-commit fsync that WAL makes unnecessary for a cache.
+    """
+    conn = getattr(_conn_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        _conn_local.conn = conn
     return conn
 
 
 def init_db():
-    """Initialize database tables"""
+    """Initialize database tables (once per process)"""
+    global _db_initialized
+    if _db_initialized:
+        return
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
+    # Schema and migrations below are already in place; skip their table scans
+    if cursor.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        _db_initialized = True
+        return
+    
+    # Let cleanup reclaim freed pages incrementally; an existing file only
+    # switches modes after one full VACUUM
+    if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        cursor.execute("VACUUM")
+    
     # Weather data cache table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS weather_cache (
@@ -37,7 +89,7 @@ def init_db():
             date_start TEXT NOT NULL,
             date_end TEXT NOT NULL,
             data TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at INTEGER NOT NULL,  -- Unix epoch seconds
             UNIQUE(lat, lng, date_start, date_end)
         )
     """)
@@ -51,7 +103,7 @@ def init_db():
             date_start TEXT NOT NULL,
             date_end TEXT NOT NULL,
             data TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at INTEGER NOT NULL,  -- Unix epoch seconds
             UNIQUE(lat, lng, date_start, date_end)
         )
     """)
@@ -64,130 +116,291 @@ def init_db():
             date_start TEXT NOT NULL,
             date_end TEXT NOT NULL,
             data TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at INTEGER NOT NULL,  -- Unix epoch seconds
             UNIQUE(field_id, date_start, date_end)
         )
     """)
     
-    # Create indexes for faster lookups
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_weather_lookup ON weather_cache(lat, lng, date_start, date_end)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_soil_lookup ON soil_moisture_cache(lat, lng, date_start, date_end)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ndvi_lookup ON ndvi_cache(field_id, date_start, date_end)")
+    # Lookup indexes end in created_at so the freshness filter is checked in
+    # the index and expired rows are never fetched. The old *_lookup indexes
+    # only duplicated the UNIQUE constraints' autoindexes.
+    for old_index in ("idx_weather_lookup", "idx_soil_lookup", "idx_ndvi_lookup"):
+        cursor.execute(f"DROP INDEX IF EXISTS {old_index}")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_weather_fresh ON weather_cache(lat, lng, date_start, date_end, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_soil_fresh ON soil_moisture_cache(lat, lng, date_start, date_end, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ndvi_fresh ON ndvi_cache(field_id, date_start, date_end, created_at)")
+    
+    # Drop rows from databases created before created_at became an epoch
+    # integer; their ISO text would compare greater than any cutoff
+    for table in ("weather_cache", "soil_moisture_cache", "ndvi_cache"):
+        cursor.execute(f"DELETE FROM {table} WHERE typeof(created_at) != 'integer'")
     
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.commit()
-    conn.close()
+    _db_initialized = True
+
+
+def _fresh_cutoff() -> int:
+    """Oldest created_at (epoch seconds) still within CACHE_TTL_SECONDS"""
+    return int(time.time()) - CACHE_TTL_SECONDS
+
+
+class _MemoryCache:
+    """
+    Bounded LRU of decoded cache payloads with a TTL (settings.cache_ttl)
+    Repeated lookups for the same key skip the SQLite query and JSON decode.
+    """
+    
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()  # cache writes also run in to_thread workers
+    
+    def get(self, key: Tuple) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key: Tuple, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+_memory_cache = _MemoryCache(MEMORY_CACHE_MAXSIZE, settings.cache_ttl)
+
+
+def _dump_cache_data(data: Any) -> bytes:
+    """
+    Serialize cache payloads with orjson (models dumped, numpy passed through)
+    """
+    if isinstance(data, BaseModel):
+        data = data.model_dump()
+    elif isinstance(data, list) and data and isinstance(data[0], BaseModel):
+        # Series are homogeneous, so type-check once rather than per item
+        data = [d.model_dump() for d in data]
+    return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
 
 
-def is_cache_valid(created_at: str) -> bool:
-    """Check if cache entry is still valid (within TTL)"""
-    try:
-        cache_time = datetime.fromisoformat(created_at)
-        age = datetime.now() - cache_time
-        return age < timedelta(hours=CACHE_TTL_HOURS)
-    except:
-        return False
+# Stored payload format: a leading version byte marks zstd-compressed JSON;
+# anything else is plain JSON (bytes, or text rows from older databases)
+_ZSTD_JSON_PREFIX = b"\x01"
+
+if HAS_ZSTD:
+    _zstd_compressor = zstd.ZstdCompressor(level=3)
+    _zstd_decompressor = zstd.ZstdDecompressor()
+
+
+def _pack_cache_blob(payload: bytes) -> bytes:
+    """Compress serialized JSON for storage (plain JSON without zstandard)"""
+    if HAS_ZSTD:
+        return _ZSTD_JSON_PREFIX + _zstd_compressor.compress(payload)
+    return payload
+
+
+def _load_cache_blob(blob: Any) -> Any:
+    """
+    Decode a stored payload; None if it's compressed and zstandard is missing
+    """
+    if isinstance(blob, bytes) and blob[:1] == _ZSTD_JSON_PREFIX:
+        if not HAS_ZSTD:
+            return None
+        return orjson.loads(_zstd_decompressor.decompress(blob[1:]))
+    return orjson.loads(blob)
 
 
 def get_weather_cache(lat: float, lng: float, date_start: str, date_end: str) -> Optional[List[Dict[str, Any]]]:
     """Get cached weather data"""
+    lat, lng = round(lat, COORD_DECIMALS), round(lng, COORD_DECIMALS)
+    key = ("weather_cache", lat, lng, date_start, date_end)
+    cached = _memory_cache.get(key)
+    if cached is not None:
+        return cached
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
     cursor.execute("""
-        SELECT data, created_at FROM weather_cache
-        WHERE lat = ? AND lng = ? AND date_start = ? AND date_end = ?
-    """, (lat, lng, date_start, date_end))
+        SELECT data FROM weather_cache
+        WHERE lat = ? AND lng = ? AND date_start = ? AND date_end = ? AND created_at > ?
+    """, (lat, lng, date_start, date_end, _fresh_cutoff()))
     
     row = cursor.fetchone()
-    conn.close()
     
-    if row and is_cache_valid(row['created_at']):
-        return json.loads(row['data'])
+    data = _load_cache_blob(row['data']) if row else None
+    if data is not None:
+        _memory_cache.set(key, data)
+        return data
     return None
 
 
+async def aget_weather_cache(lat: float, lng: float, date_start: str, date_end: str) -> Optional[List[Dict[str, Any]]]:
+    """Async get_weather_cache: in-process hits return inline, SQLite reads run in a worker thread"""
+    key = ("weather_cache", round(lat, COORD_DECIMALS), round(lng, COORD_DECIMALS), date_start, date_end)
+    cached = _memory_cache.get(key)
+    if cached is not None:
+        return cached
+    return await asyncio.to_thread(get_weather_cache, lat, lng, date_start, date_end)
+
+
 def set_weather_cache(lat: float, lng: float, date_start: str, date_end: str, data: List[Dict[str, Any]]):
     """Cache weather data"""
+    set_weather_cache_many([(lat, lng, date_start, date_end, data)])
+
+
+def set_weather_cache_many(items: List[Tuple[float, float, str, str, List[Dict[str, Any]]]]):
+    """
+    Cache weather data for many keys with one executemany and a single commit
+    Items are (lat, lng, date_start, date_end, data) tuples
+    """
+    created_at = int(time.time())
+    encoded = [
+        ((round(lat, COORD_DECIMALS), round(lng, COORD_DECIMALS), date_start, date_end), _dump_cache_data(data))
+        for lat, lng, date_start, date_end, data in items
+    ]
+    rows = [(*key, _pack_cache_blob(payload), created_at) for key, payload in encoded]
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    data_json = json.dumps([d.dict() if hasattr(d, 'dict') else d for d in data])
-    
-    cursor.execute("""
+    cursor.executemany("""
         INSERT OR REPLACE INTO weather_cache (lat, lng, date_start, date_end, data, created_at)
         VALUES (?, ?, ?, ?, ?, ?)
-    """, (lat, lng, date_start, date_end, data_json, datetime.now().isoformat()))
+    """, rows)
     
     conn.commit()
-    conn.close()
+    
+    for key, payload in encoded:
+        _memory_cache.set(("weather_cache", *key), orjson.loads(payload))
 
 
 def get_soil_moisture_cache(lat: float, lng: float, date_start: str, date_end: str) -> Optional[List[Dict[str, Any]]]:
     """Get cached soil moisture data"""
+    lat, lng = round(lat, COORD_DECIMALS), round(lng, COORD_DECIMALS)
+    key = ("soil_moisture_cache", lat, lng, date_start, date_end)
+    cached = _memory_cache.get(key)
+    if cached is not None:
+        return cached
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
     cursor.execute("""
-        SELECT data, created_at FROM soil_moisture_cache
-        WHERE lat = ? AND lng = ? AND date_start = ? AND date_end = ?
-    """, (lat, lng, date_start, date_end))
+        SELECT data FROM soil_moisture_cache
+        WHERE lat = ? AND lng = ? AND date_start = ? AND date_end = ? AND created_at > ?
+    """, (lat, lng, date_start, date_end, _fresh_cutoff()))
     
     row = cursor.fetchone()
-    conn.close()
     
-    if row and is_cache_valid(row['created_at']):
-        return json.loads(row['data'])
+    data = _load_cache_blob(row['data']) if row else None
+    if data is not None:
+        _memory_cache.set(key, data)
+        return data
     return None
 
 
+async def aget_soil_moisture_cache(lat: float, lng: float, date_start: str, date_end: str) -> Optional[List[Dict[str, Any]]]:
+    """Async get_soil_moisture_cache: in-process hits return inline, SQLite reads run in a worker thread"""
+    key = ("soil_moisture_cache", round(lat, COORD_DECIMALS), round(lng, COORD_DECIMALS), date_start, date_end)
+    cached = _memory_cache.get(key)
+    if cached is not None:
+        return cached
+    return await asyncio.to_thread(get_soil_moisture_cache, lat, lng, date_start, date_end)
+
+
 def set_soil_moisture_cache(lat: float, lng: float, date_start: str, date_end: str, data: List[Dict[str, Any]]):
     """Cache soil moisture data"""
+    set_soil_moisture_cache_many([(lat, lng, date_start, date_end, data)])
+
+
+def set_soil_moisture_cache_many(items: List[Tuple[float, float, str, str, List[Dict[str, Any]]]]):
+    """
+    Cache soil moisture data for many keys with one executemany and a single commit
+    Items are (lat, lng, date_start, date_end, data) tuples
+    """
+    created_at = int(time.time())
+    encoded = [
+        ((round(lat, COORD_DECIMALS), round(lng, COORD_DECIMALS), date_start, date_end), _dump_cache_data(data))
+        for lat, lng, date_start, date_end, data in items
+    ]
+    rows = [(*key, _pack_cache_blob(payload), created_at) for key, payload in encoded]
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    data_json = json.dumps([d.dict() if hasattr(d, 'dict') else d for d in data])
-    
-    cursor.execute("""
+    cursor.executemany("""
         INSERT OR REPLACE INTO soil_moisture_cache (lat, lng, date_start, date_end, data, created_at)
         VALUES (?, ?, ?, ?, ?, ?)
-    """, (lat, lng, date_start, date_end, data_json, datetime.now().isoformat()))
+    """, rows)
     
     conn.commit()
-    conn.close()
+    
+    for key, payload in encoded:
+        _memory_cache.set(("soil_moisture_cache", *key), orjson.loads(payload))
 
 
 def get_ndvi_cache(field_id: str, date_start: str, date_end: str) -> Optional[Dict[str, Any]]:
     """Get cached NDVI data"""
+    key = ("ndvi_cache", field_id, date_start, date_end)
+    cached = _memory_cache.get(key)
+    if cached is not None:
+        return cached
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
     cursor.execute("""
-        SELECT data, created_at FROM ndvi_cache
-        WHERE field_id = ? AND date_start = ? AND date_end = ?
-    """, (field_id, date_start, date_end))
+        SELECT data FROM ndvi_cache
+        WHERE field_id = ? AND date_start = ? AND date_end = ? AND created_at > ?
+    """, (field_id, date_start, date_end, _fresh_cutoff()))
     
     row = cursor.fetchone()
-    conn.close()
     
-    if row and is_cache_valid(row['created_at']):
-        return json.loads(row['data'])
+    data = _load_cache_blob(row['data']) if row else None
+    if data is not None:
+        _memory_cache.set(key, data)
+        return data
     return None
 
 
 def set_ndvi_cache(field_id: str, date_start: str, date_end: str, data: Dict[str, Any]):
     """Cache NDVI data"""
+    set_ndvi_cache_many([(field_id, date_start, date_end, data)])
+
+
+def set_ndvi_cache_many(items: List[Tuple[str, str, str, Dict[str, Any]]]):
+    """
+    Cache NDVI data for many keys with one executemany and a single commit
+    Items are (field_id, date_start, date_end, data) tuples
+    """
+    created_at = int(time.time())
+    encoded = [
+        ((field_id, date_start, date_end), _dump_cache_data(data))
+        for field_id, date_start, date_end, data in items
+    ]
+    rows = [(*key, _pack_cache_blob(payload), created_at) for key, payload in encoded]
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    data_json = json.dumps(data.dict() if hasattr(data, 'dict') else data)
-    
-    cursor.execute("""
+    cursor.executemany("""
         INSERT OR REPLACE INTO ndvi_cache (field_id, date_start, date_end, data, created_at)
         VALUES (?, ?, ?, ?, ?)
-    """, (field_id, date_start, date_end, data_json, datetime.now().isoformat()))
+    """, rows)
     
     conn.commit()
-    conn.close()
+    
+    for key, payload in encoded:
+        _memory_cache.set(("ndvi_cache", *key), orjson.loads(payload))
 
 
 def cleanup_old_cache():
@@ -195,16 +408,33 @@ def cleanup_old_cache():
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cutoff_time = (datetime.now() - timedelta(hours=CACHE_TTL_HOURS * 2)).isoformat()
+    cutoff_time = int(time.time()) - CACHE_TTL_SECONDS * 2
     
     cursor.execute("DELETE FROM weather_cache WHERE created_at < ?", (cutoff_time,))
     cursor.execute("DELETE FROM soil_moisture_cache WHERE created_at < ?", (cutoff_time,))
     cursor.execute("DELETE FROM ndvi_cache WHERE created_at < ?", (cutoff_time,))
     
     conn.commit()
-    conn.close()
+    
+    # Return a bounded batch of the freed pages so the file stays compact.
+    # The pragma frees one page per step and execute() steps a row-less
+    # statement only once, so run it through executescript to completion.
+    conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_CLEANUP});")
+
 
+async def run_cache_cleanup_loop() -> None:
+    """
+    Run cleanup_old_cache off the event loop now and then every
+    CLEANUP_INTERVAL_SECONDS until cancelled
+    """
+    while True:
+        try:
+            await asyncio.to_thread(cleanup_old_cache)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Keep the loop alive; the next interval retries
+            logger.exception("cache cleanup failed")
+        await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
 
-# Initialize database on import
-init_db()
 
@@ -2,38 +2,82 @@
 FastAPI application entry point
 """
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import logging
+import random
+import traceback
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.api.responses import APIJSONResponse, data_etag, etag_matches
 from app.api.routes import farms, crops, fields, ndvi, weather, soil, kpi, yield_prediction, carbon, stress
-from app.database import init_db, cleanup_old_cache
+from app.database import init_db, run_cache_cleanup_loop
+from app.services.yield_calculator import calculate_yield_prediction
+from app.services.carbon_calculator import calculate_carbon_metrics
+from app.services.precompute import run_kpi_precompute_worker, precompute_all_fields, claim_precompute_lock, run_in_background
+from app.services.copernicus_auth import close_http_client
+from app.utils.clock import RequestTimestampMiddleware, current_timestamp, run_timestamp_refresher
+from app.utils import carbon_kernels, ndvi_kernels, reanalysis_kernels
+
+logging.basicConfig(level=settings.log_level.upper())
 
 app = FastAPI(
     title="CropAgnoAI Backend API",
     description="Agriculture Analytics Dashboard Backend",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=APIJSONResponse
 )
 
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
     """Initialize database and cleanup old cache on startup"""
-    init_db()
-    cleanup_old_cache()
-    print("[Backend] Database initialized and old cache cleaned up")
+    # Keep the cached response timestamp fresh for RequestTimestampMiddleware
+    app.state.timestamp_refresher = asyncio.create_task(run_timestamp_refresher())
+    
+    # Single worker draining the bounded KPI precompute queue
+    app.state.kpi_precompute_worker = asyncio.create_task(run_kpi_precompute_worker())
+
+    # Build and cache the OpenAPI schema now rather than on the first /openapi.json
+    app.openapi()
+
+    # The first run on an existing cache.db VACUUMs the whole file and scans
+    # every table, so migrate in a worker thread rather than on the event loop
+    await asyncio.to_thread(init_db)
+    print("[Backend] Database initialized")
+    
+    # Compile the Numba kernels before serving (cache=True makes this a disk
+    # load after the first deploy) so early requests don't stall on JIT
+    for kernels in (reanalysis_kernels, carbon_kernels, ndvi_kernels):
+        await asyncio.to_thread(kernels.warm_up)
+    
+    # Expire old cache rows (and vacuum their pages) in the background, now
+    # and periodically, so startup doesn't wait on the DELETE scans
+    app.state.cache_cleanup = asyncio.create_task(run_cache_cleanup_loop())
     
     # Optionally trigger precomputation in background (non-blocking)
-    # This will precompute data for known fields
+    # This will precompute data for known fields, in one worker process only
     try:
-        from app.services.precompute import precompute_all_fields
-        import asyncio
-        # Run in background, don't await
-        asyncio.create_task(precompute_all_fields())
-        print("[Backend] Background precomputation started")
+        if claim_precompute_lock():
+            # Run in background, don't await
+            run_in_background(precompute_all_fields())
+            print("[Backend] Background precomputation started")
+        else:
+            print("[Backend] Background precomputation running in another worker")
     except Exception as e:
         # Silently fail - precomputation is optional
         print(f"[Backend] Precomputation failed (optional): {e}")
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the background tasks and release pooled upstream connections"""
+    app.state.timestamp_refresher.cancel()
+    app.state.kpi_precompute_worker.cancel()
+    app.state.cache_cleanup.cancel()
+    await close_http_client()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -42,6 +86,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestTimestampMiddleware)
 
 # Include routers
 app.include_router(farms.router, prefix="/api", tags=["farms"])
@@ -51,55 +96,93 @@ app.include_router(ndvi.router, prefix="/api", tags=["ndvi"])
 app.include_router(weather.router, prefix="/api", tags=["weather"])
 app.include_router(soil.router, prefix="/api", tags=["soil"])
 app.include_router(stress.router, prefix="/api", tags=["stress"])
+app.include_router(kpi.router, prefix="/api", tags=["kpi"])
 
-# KPI, Yield, Carbon endpoints - 직접 등록 (라우터 파일 import 실패 대비)
-from app.api.models import KPISummary, YieldPredictionData, CarbonMetricsData, APIResponse
-from typing import List, Optional
-from datetime import datetime, timedelta
-import random
+# Yield, Carbon endpoints - 직접 등록 (라우터 파일 import 실패 대비)
+from app.api.models import YieldPredictionData, CarbonMetricsData, api_ok, YieldPredictionListResponse, CarbonMetricsListResponse
+from app.utils.inflight import compute_once
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+
+# Yield predictions in flight, keyed by field, location and date range
+_yield_inflight: Dict[str, "asyncio.Future[List[YieldPredictionData]]"] = {}
+
+
+def _daily_iso_timestamps(first_day: datetime, last: datetime) -> List[str]:
+    """ISO timestamps for each midnight from first_day through last, formatted in one NumPy pass"""
+    n_days = max(0, (last.date() - first_day.date()).days + 1)
+    return np.datetime_as_string(np.datetime64(first_day.date(), 'D') + np.arange(n_days), unit='s').tolist()
 
-# KPI endpoint - 실제 데이터 사용
-@app.get("/api/kpi", response_model=APIResponse[KPISummary], tags=["kpi"])
-async def get_kpi_summary(farm_id: Optional[str] = None, crop_id: Optional[str] = None, lat: Optional[float] = None, lng: Optional[float] = None, field_id: Optional[str] = None):
-    """Get KPI summary (productivity, water efficiency, ESG accuracy) calculated from actual data"""
-    from app.services.kpi_calculator import calculate_kpi_summary
+
+# Mock series served when a calculator returns nothing. Built once per field
+# per day (day_bucket = date.toordinal()) so degraded mode stays cheap; rows
+# are shared across requests and must not be mutated.
+@lru_cache(maxsize=256)
+def _fallback_yield_rows(field_id: str, day_bucket: int) -> Tuple[YieldPredictionData, ...]:
+    """Mock 30-day yield series"""
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=30)
+    current_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    base_yield = 40.0
+    first_offset = (current_date - start_date).days
     
-    try:
-        kpi_summary = await calculate_kpi_summary(
-            farm_id=farm_id,
-            crop_id=crop_id,
-            lat=lat,
-            lng=lng,
-            field_id=field_id
-        )
+    rows = []
+    for i, timestamp in enumerate(_daily_iso_timestamps(current_date, end_date)):
+        days_passed = first_offset + i
+        trend = days_passed * 0.5
+        variation = random.random() * 8 - 4
+        yield_value = base_yield + trend + variation
+        confidence = 0.85 + random.random() * 0.1
         
-        return APIResponse(
-            data=kpi_summary,
-            timestamp=datetime.now().isoformat(),
-            status="success"
-        )
-    except Exception as e:
-        # Fallback to default values on error
-        import traceback
-        traceback.print_exc()
-        kpi_summary = KPISummary(
-            productivityIncrease=20.0,
-            waterEfficiency=25.0,
-            esgAccuracy=92.0,
-            timestamp=datetime.now().isoformat()
-        )
-        return APIResponse(
-            data=kpi_summary,
-            timestamp=datetime.now().isoformat(),
-            status="success"
-        )
+        rows.append(YieldPredictionData(
+            timestamp=timestamp,
+            value=round(yield_value, 2),
+            fieldId=field_id,
+            confidence=round(confidence, 3)
+        ))
+    return tuple(rows)
+
+
+@lru_cache(maxsize=256)
+def _fallback_carbon_rows(field_id: str, day_bucket: int) -> Tuple[CarbonMetricsData, ...]:
+    """Mock 30-day carbon series"""
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=30)
+    current_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    base_value = 45.0
+    
+    rows = []
+    for timestamp in _daily_iso_timestamps(current_date, end_date):
+        variation = random.random() * 12 - 6
+        carbon_value = base_value + variation
+        metric_type = "sequestration" if random.random() > 0.5 else "net"
+        
+        rows.append(CarbonMetricsData(
+            timestamp=timestamp,
+            value=round(carbon_value, 2),
+            fieldId=field_id,
+            metricType=metric_type
+        ))
+    return tuple(rows)
+
+
+def _timeline_response(request: Request, timeline) -> Response:
+    """
+    Serve a calculated timeline with an ETag over its rows, or an empty 304
+    when the client already has exactly these rows
+    """
+    etag = data_etag(timeline)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    # Rows are plain dicts from trusted calculator output; skip response_model revalidation
+    return APIJSONResponse(api_ok(timeline, timestamp=current_timestamp()), headers={"ETag": etag})
+
 
 # Yield prediction endpoint - 실제 데이터 사용
-@app.get("/api/yield-prediction/{field_id}", response_model=APIResponse[List[YieldPredictionData]], tags=["yield"])
-async def get_yield_prediction(field_id: str, lat: Optional[float] = None, lng: Optional[float] = None, date_start: Optional[str] = None, date_end: Optional[str] = None):
+@app.get("/api/yield-prediction/{field_id}", response_model=YieldPredictionListResponse, tags=["yield"])
+async def get_yield_prediction(request: Request, field_id: str, lat: Optional[float] = None, lng: Optional[float] = None, date_start: Optional[str] = None, date_end: Optional[str] = None):
     """Get yield prediction data for a field (calculated from actual data)"""
-    from app.services.yield_calculator import calculate_yield_prediction
-    
     # Use default location if not provided (Hartland Colony, Alberta)
     if lat is None:
         lat = 52.619167  # Hartland Colony, Alberta
@@ -107,54 +190,33 @@ async def get_yield_prediction(field_id: str, lat: Optional[float] = None, lng:
         lng = -113.092639
     
     try:
-        timeline = await calculate_yield_prediction(
-            field_id=field_id,
-            lat=lat,
-            lng=lng,
-            date_start=date_start,
-            date_end=date_end
+        timeline = await compute_once(
+            _yield_inflight,
+            f"{field_id}|{lat:.4f}|{lng:.4f}|{date_start}|{date_end}",
+            lambda: calculate_yield_prediction(
+                field_id=field_id,
+                lat=lat,
+                lng=lng,
+                date_start=date_start,
+                date_end=date_end
+            )
         )
         
         # If calculation failed, return empty list
         if not timeline:
             # Fallback to mock data only if calculation completely fails
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=30)
-            timeline = []
-            current_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            base_yield = 40.0
-            
-            while current_date <= end_date:
-                days_passed = (current_date - start_date).days
-                trend = days_passed * 0.5
-                variation = random.random() * 8 - 4
-                yield_value = base_yield + trend + variation
-                confidence = 0.85 + random.random() * 0.1
-                
-                timeline.append(YieldPredictionData(
-                    timestamp=current_date.isoformat(),
-                    value=round(yield_value, 2),
-                    fieldId=field_id,
-                    confidence=round(confidence, 3)
-                ))
-                current_date += timedelta(days=1)
+            # No ETag: mock rows must not be cached once real data recovers
+            return APIJSONResponse(api_ok(_fallback_yield_rows(field_id, date.today().toordinal()), timestamp=current_timestamp()))
         
-        return APIResponse(
-            data=timeline,
-            timestamp=datetime.now().isoformat(),
-            status="success"
-        )
+        return _timeline_response(request, timeline)
     except Exception as e:
-        import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 # Carbon metrics endpoint - 직접 등록
-@app.get("/api/carbon-metrics/{field_id}", response_model=APIResponse[List[CarbonMetricsData]], tags=["carbon"])
-async def get_carbon_metrics(field_id: str, lat: Optional[float] = None, lng: Optional[float] = None, date_start: Optional[str] = None, date_end: Optional[str] = None):
+@app.get("/api/carbon-metrics/{field_id}", response_model=CarbonMetricsListResponse, tags=["carbon"])
+async def get_carbon_metrics(request: Request, field_id: str, lat: Optional[float] = None, lng: Optional[float] = None, date_start: Optional[date] = None, date_end: Optional[date] = None):
     """Get carbon metrics data for a field (calculated from actual data)"""
-    from app.services.carbon_calculator import calculate_carbon_metrics
-    
     # Use default location if not provided (Hartland Colony, Alberta)
     if lat is None:
         lat = 52.619167  # Hartland Colony, Alberta
@@ -172,30 +234,10 @@ async def get_carbon_metrics(field_id: str, lat: Optional[float] = None, lng: Op
     # If calculation failed, return empty list
     if not timeline:
         # Fallback to mock data
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        timeline = []
-        current_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        base_value = 45.0
-        
-        while current_date <= end_date:
-            variation = random.random() * 12 - 6
-            carbon_value = base_value + variation
-            metric_type = "sequestration" if random.random() > 0.5 else "net"
-            
-            timeline.append(CarbonMetricsData(
-                timestamp=current_date.isoformat(),
-                value=round(carbon_value, 2),
-                fieldId=field_id,
-                metricType=metric_type
-            ))
-            current_date += timedelta(days=1)
+        # No ETag: mock rows must not be cached once real data recovers
+        return APIJSONResponse(api_ok(_fallback_carbon_rows(field_id, date.today().toordinal()), timestamp=current_timestamp()))
     
-    return APIResponse(
-        data=timeline,
-        timestamp=datetime.now().isoformat(),
-        status="success"
-    )
+    return _timeline_response(request, timeline)
 
 
 @app.get("/")
@@ -3,11 +3,32 @@ Carbon metrics calculator
 Calculates carbon metrics from actual data
 """
 
-from app.api.models import CarbonMetricsData
+import asyncio
+from app.api.models import CarbonMetricsData, TimeSeriesData
 from app.services.era5 import get_weather_data
 from app.services.sentinel2 import get_ndvi_timeline
+from app.utils.carbon_kernels import daily_carbon, daily_jitter
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import numpy as np
+
+
+def _align_to_days(series: List[TimeSeriesData], days: np.ndarray, default: float) -> np.ndarray:
+    """
+    Value of series on each of days (datetime64[D]), default where it has none
+    Later samples for the same day win, as with a date-keyed dict.
+    """
+    if not series:
+        return np.full(days.shape[0], default)
+    dates = np.array([d.timestamp[:10] for d in series], dtype='datetime64[D]')
+    values = np.fromiter((d.value for d in series), dtype=np.float64, count=len(series))
+    order = np.argsort(dates, kind='stable')
+    dates, values = dates[order], values[order]
+    # Last sample at or before each day, kept only if it falls on that day
+    idx = np.searchsorted(dates, days, side='right') - 1
+    idx_clamped = np.maximum(idx, 0)
+    hit = (idx >= 0) & (dates[idx_clamped] == days)
+    return np.where(hit, values[idx_clamped], default)
 
 
 async def calculate_carbon_metrics(
@@ -16,8 +37,8 @@ async def calculate_carbon_metrics(
     lng: float,
     crop_type: Optional[str] = None,
     area_hectares: Optional[float] = None,
-    date_start: Optional[str] = None,
-    date_end: Optional[str] = None
+    date_start: Optional[date] = None,
+    date_end: Optional[date] = None
 ) -> List[CarbonMetricsData]:
     """
     Calculate carbon metrics from actual data
@@ -28,122 +49,93 @@ async def calculate_carbon_metrics(
         lng: Longitude
         crop_type: Crop type (optional, for crop-specific calculations)
         area_hectares: Field area in hectares (optional)
-        date_start: Start date (YYYY-MM-DD), optional
-        date_end: End date (YYYY-MM-DD), optional
+        date_start: Start date, optional (already parsed at the API boundary)
+        date_end: End date, optional
     
     Returns:
         List of CarbonMetricsData with carbon metrics
     """
-    # Parse dates
     if date_end:
-        end_date = datetime.fromisoformat(date_end.replace('Z', '+00:00'))
+        end_date = datetime.combine(date_end, datetime.min.time())
     else:
         end_date = datetime.now()
     
     if date_start:
-        start_date = datetime.fromisoformat(date_start.replace('Z', '+00:00'))
+        start_date = datetime.combine(date_start, datetime.min.time())
     else:
         start_date = end_date - timedelta(days=30)
     
-    # Get actual data with timeout
-    import asyncio
+    # Weather/NDVI services take YYYY-MM-DD strings
+    date_start_str = date_start.isoformat() if date_start else None
+    date_end_str = date_end.isoformat() if date_end else None
     
     try:
-        try:
-            weather_data = await asyncio.wait_for(
+        # Weather and NDVI come from independent upstreams, so fetch them
+        # concurrently, each under its own timeout
+        weather_data, ndvi_data = await asyncio.gather(
+            asyncio.wait_for(
                 get_weather_data(
                     lat=lat,
                     lng=lng,
-                    date_start=date_start,
-                    date_end=date_end
+                    date_start=date_start_str,
+                    date_end=date_end_str
                 ),
                 timeout=30.0
-            )
-        except asyncio.TimeoutError:
-            print("[Carbon Calculator] Weather data timeout, using defaults")
-            weather_data = []
-        except Exception as e:
-            print(f"[Carbon Calculator] Weather data error: {e}")
-            weather_data = []
-        
-        # Try to get NDVI data (may fail if API endpoint not available)
-        ndvi_data = []
-        try:
-            ndvi_data = await asyncio.wait_for(
+            ),
+            asyncio.wait_for(
                 get_ndvi_timeline(
                     field_id=field_id,
-                    date_start=date_start,
-                    date_end=date_end
+                    date_start=date_start_str,
+                    date_end=date_end_str
                 ),
                 timeout=10.0
-            )
-        except (asyncio.TimeoutError, Exception) as e:
-            print(f"[Carbon Calculator] NDVI data error (optional): {e}")
-            pass  # NDVI data is optional
+            ),
+            return_exceptions=True
+        )
         
-        # Calculate carbon metrics based on actual data
-        timeline = []
-        current_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        if isinstance(weather_data, asyncio.TimeoutError):
+            print("[Carbon Calculator] Weather data timeout, using defaults")
+            weather_data = []
+        elif isinstance(weather_data, Exception):
+            print(f"[Carbon Calculator] Weather data error: {weather_data}")
+            weather_data = []
+        
+        # NDVI data is optional (may fail if API endpoint not available)
+        if isinstance(ndvi_data, Exception):
+            print(f"[Carbon Calculator] NDVI data error (optional): {ndvi_data}")
+            ndvi_data = []
         
+        # Calculate carbon metrics based on actual data
         # Base carbon sequestration (kg CO2/ha/day)
         # Varies by crop type and NDVI
         base_sequestration = 2.0  # kg CO2/ha/day for healthy crops
+        # Emissions from farming practices (simplified)
+        estimated_emissions = 0.5  # kg CO2/ha/day (simplified estimate)
+        
+        # One entry per day from start_date through end_date, computed as arrays
+        n_days = max(0, (end_date.date() - start_date.date()).days + 1)
+        days = np.datetime64(start_date.date(), 'D') + np.arange(n_days)
+        timestamps = np.datetime_as_string(days, unit='s').tolist()
         
-        # Create date-indexed maps
-        weather_map = {d.timestamp[:10]: d.value for d in weather_data}
-        ndvi_map = {d.timestamp[:10]: d.value for d in ndvi_data}
+        # Align the series to those days by sorted search rather than per-day dict lookups
+        temp = _align_to_days(weather_data, days, 15.0)
+        ndvi = _align_to_days(ndvi_data, days, 0.6)
         
-        while current_date <= end_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            
-            # Get data for this date
-            temp = weather_map.get(date_str, 15.0)
-            ndvi = ndvi_map.get(date_str, 0.6)
-            
-            # Calculate carbon sequestration based on NDVI
-            # Higher NDVI = more biomass = more carbon sequestration
-            ndvi_factor = 0.5 + ndvi * 0.5  # Map 0-1 NDVI to 0.5-1.0 factor
-            
-            # Temperature factor (optimal growth = more carbon)
-            if 15 <= temp <= 25:
-                temp_factor = 1.0
-            else:
-                temp_factor = 0.8  # Reduced growth outside optimal range
-            
-            # Calculate carbon sequestration
-            sequestration = base_sequestration * ndvi_factor * temp_factor
-            
-            # Add some variation
-            import random
-            variation = random.random() * 0.5 - 0.25  # ±0.25 kg
-            sequestration = max(0, sequestration + variation)
-            
-            # Determine metric type (sequestration vs net)
-            # Net carbon = sequestration - emissions
-            # For MVP, we'll use sequestration as primary metric
-            metric_type = "sequestration"
-            
-            # Calculate net carbon (sequestration - estimated emissions)
-            # Emissions from farming practices (simplified)
-            estimated_emissions = 0.5  # kg CO2/ha/day (simplified estimate)
-            net_carbon = sequestration - estimated_emissions
-            
-            # Use net carbon if positive, otherwise use sequestration
-            if net_carbon > 0:
-                carbon_value = net_carbon
-                metric_type = "net"
-            else:
-                carbon_value = sequestration
-                metric_type = "sequestration"
-            
-            timeline.append(CarbonMetricsData(
-                timestamp=current_date.isoformat(),
-                value=round(carbon_value, 2),
+        # Higher NDVI and optimal temperature (15-25C) = more carbon; values are
+        # net of emissions when positive, otherwise raw sequestration
+        variation = daily_jitter(field_id, days, 0.25)  # ±0.25 kg, same per field and day
+        carbon_values, is_net = daily_carbon(temp, ndvi, variation, base_sequestration, estimated_emissions)
+        carbon_values = carbon_values.round(2)
+        
+        timeline = [
+            CarbonMetricsData(
+                timestamp=timestamp,
+                value=value,
                 fieldId=field_id,
-                metricType=metric_type
-            ))
-            
-            current_date += timedelta(days=1)
+                metricType="net" if net else "sequestration"
+            )
+            for timestamp, value, net in zip(timestamps, carbon_values.tolist(), is_net.tolist())
+        ]
         
         return timeline
         
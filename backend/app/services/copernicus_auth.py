@@ -2,13 +2,78 @@
 Copernicus Data Space API OAuth2 authentication
 """
 
+import asyncio
 import httpx
 from app.config import settings
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, Tuple
 import time
 
+# Try to import aiohttp, token requests use the shared httpx client if not available
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
 # Token cache
 _token_cache: Optional[Dict[str, any]] = None
+# Serializes refreshes so concurrent misses make one token request
+_token_lock = asyncio.Lock()
+
+# One pooled client for all Copernicus calls, so token refreshes, searches
+# and downloads reuse connections instead of a TLS handshake per call.
+# Opened on first use and reset on close, so a restarted app gets a fresh one
+_client: Optional[httpx.AsyncClient] = None
+# aiohttp session for the token POST (its C parser is cheaper per request),
+# opened on first use since it must be created inside the running loop
+_token_session: Optional["aiohttp.ClientSession"] = None
+
+TOKEN_URL = "https://identity.dataspace.copernicus.eu/auth/realms/CDSE/protocol/openid-connect/token"
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared Copernicus HTTP client (callers must not close it)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20)
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client's connection pool (on app shutdown)"""
+    global _client, _token_session
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _token_session is not None:
+        await _token_session.close()
+        _token_session = None
+
+
+async def _post_token_request(form: Dict[str, str]) -> Tuple[int, Any]:
+    """
+    POST the client-credentials form to TOKEN_URL
+    Returns (status, parsed JSON) on 200, (status, response text) otherwise.
+    """
+    global _token_session
+    if HAS_AIOHTTP:
+        if _token_session is None or _token_session.closed:
+            _token_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=600),
+                timeout=aiohttp.ClientTimeout(total=10.0)
+            )
+        async with _token_session.post(TOKEN_URL, data=form) as response:
+            if response.status == 200:
+                return response.status, await response.json()
+            return response.status, await response.text()
+    
+    response = await get_http_client().post(TOKEN_URL, data=form, timeout=10.0)
+    if response.status_code == 200:
+        return response.status_code, response.json()
+    return response.status_code, response.text
 
 
 async def get_access_token() -> Optional[str]:
@@ -28,28 +93,21 @@ async def get_access_token() -> Optional[str]:
         print("[Copernicus Auth] Missing credentials")
         return None
     
-    # OAuth2 token endpoint
-    token_url = "https://identity.dataspace.copernicus.eu/auth/realms/CDSE/protocol/openid-connect/token"
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                token_url,
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": settings.copernicus_client_id,
-                    "client_secret": settings.copernicus_client_secret,
-                },
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded",
-                },
-                timeout=10.0
-            )
+    async with _token_lock:
+        # Another caller may have refreshed the token while we waited
+        if _token_cache and _token_cache.get('expires_at', 0) > time.time():
+            return _token_cache.get('access_token')
+        
+        try:
+            status, body = await _post_token_request({
+                "grant_type": "client_credentials",
+                "client_id": settings.copernicus_client_id,
+                "client_secret": settings.copernicus_client_secret,
+            })
             
-            if response.status_code == 200:
-                data = response.json()
-                access_token = data.get("access_token")
-                expires_in = data.get("expires_in", 3600)  # Default 1 hour
+            if status == 200:
+                access_token = body.get("access_token")
+                expires_in = body.get("expires_in", 3600)  # Default 1 hour
                 
                 # Cache the token
                 _token_cache = {
@@ -60,29 +118,23 @@ async def get_access_token() -> Optional[str]:
                 print("[Copernicus Auth] Successfully authenticated")
                 return access_token
             else:
-                print(f"[Copernicus Auth] Authentication failed: {response.status_code} - {response.text}")
+                print(f"[Copernicus Auth] Authentication failed: {status} - {body}")
                 return None
                 
-    except Exception as e:
-        print(f"[Copernicus Auth] Error during authentication: {e}")
-        return None
+        except Exception as e:
+            print(f"[Copernicus Auth] Error during authentication: {e}")
+            return None
 
 
-async def get_authenticated_client() -> Optional[httpx.AsyncClient]:
+async def get_auth_headers() -> Optional[Dict[str, str]]:
     """
-    Get an authenticated httpx client with access token
+    Get the Authorization header for Copernicus requests
     
     Returns:
-        httpx.AsyncClient with authorization header or None
+        Header dict to pass with requests on get_http_client(), or None
     """
     token = await get_access_token()
     if not token:
         return None
     
-    return httpx.AsyncClient(
-        headers={
-            "Authorization": f"Bearer {token}",
-        },
-        timeout=30.0
-    )
-
+    return {"Authorization": f"Bearer {token}"}
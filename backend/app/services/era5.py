@@ -4,10 +4,21 @@ ERA5 weather data service
 
 from app.config import settings
 from app.api.models import TimeSeriesData
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
-import random
 import os
+import tempfile
+import asyncio
+import traceback
+import numpy as np
+import pandas as pd
+from app.database import aget_weather_cache, set_weather_cache
+from app.utils.log_throttle import get_throttled_logger
+from app.utils.reanalysis_kernels import k_to_c, cf_times_to_iso, mock_rng, nearest_index, yearly_ranges
+from app.utils.cds import CDS_TEMP_DIR, cds_semaphore, parse_date
+from app.utils.grib_point import HAS_ECCODES, read_grib_point
+
+logger = get_throttled_logger(__name__)
 
 # Try to import cdsapi
 try:
@@ -17,12 +28,46 @@ except ImportError:
     HAS_CDSAPI = False
     print("[ERA5] Warning: cdsapi not installed. Using mock data.")
 
-# Try to import numpy, fallback to random if not available
+# Try to import xarray for NetCDF parsing, fallback to netCDF4 if not available
 try:
-    import numpy as np
-    HAS_NUMPY = True
+    import xarray as xr
+    HAS_XARRAY = True
 except ImportError:
-    HAS_NUMPY = False
+    HAS_XARRAY = False
+
+try:
+    import netCDF4
+    HAS_NETCDF4 = True
+except ImportError:
+    HAS_NETCDF4 = False
+
+
+def _read_netcdf_point(path: str, lat: float, lng: float) -> Tuple[List[str], np.ndarray]:
+    """
+    t2m series (Kelvin) at the grid point nearest (lat, lng) from a CDS NetCDF download
+    
+    Returns:
+        (ISO timestamps, raw values), one entry per time step
+    """
+    # Times are converted in one pass, and nothing is read twice, so skip
+    # xarray's time decoding and caching
+    ds = xr.open_dataset(path, decode_times=False, cache=False)
+    try:
+        temp_data = ds['t2m']  # 2m temperature variable
+        
+        # Nearest grid point by index on the (tiny) bbox axes. Index before
+        # .values: with cache=False the variable stays lazily backed by the
+        # file, so only this point's time series is read from disk
+        lat_idx = nearest_index(ds['latitude'].values, lat)
+        lng_idx = nearest_index(ds['longitude'].values, lng)
+        point_values = temp_data.isel(latitude=lat_idx, longitude=lng_idx).values
+        
+        if 'time' in temp_data.dims:
+            return cf_times_to_iso(ds['time'].values, ds['time'].attrs['units']), point_values
+        # Single value (no time dimension) - use current time
+        return [datetime.now().isoformat()], np.atleast_1d(point_values)[:1]
+    finally:
+        ds.close()
 
 
 def _setup_cds_client():
@@ -63,51 +108,23 @@ async def get_weather_data(
     Returns:
         List of TimeSeriesData with temperature values
     """
-    # Parse dates - use safe parsing to avoid "day is out of range" errors
-    try:
-        if date_end:
-            # Try parsing with timezone first
-            try:
-                end_date = datetime.fromisoformat(date_end.replace('Z', '+00:00'))
-            except:
-                # Try without timezone
-                try:
-                    end_date = datetime.fromisoformat(date_end)
-                except:
-                    # Fallback to now
-                    end_date = datetime.now()
-        else:
-            end_date = datetime.now()
-        
-        if date_start:
-            try:
-                start_date = datetime.fromisoformat(date_start.replace('Z', '+00:00'))
-            except:
-                try:
-                    start_date = datetime.fromisoformat(date_start)
-                except:
-                    start_date = end_date - timedelta(days=30)
-        else:
-            start_date = end_date - timedelta(days=30)
-    except Exception as e:
-        # If anything goes wrong, use safe defaults
-        print(f"[ERA5] Date parsing error: {e}, using defaults")
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
+    # Parse dates - malformed or out-of-range values fall back to defaults
+    end_date = parse_date(date_end, datetime.now())
+    start_date = parse_date(date_start, end_date - timedelta(days=30))
     
     # Normalize dates to strings for cache lookup
     date_start_str = start_date.strftime('%Y-%m-%d')
     date_end_str = end_date.strftime('%Y-%m-%d')
     
     # Check cache first
-    from app.database import get_weather_cache, set_weather_cache
-    cached_data = get_weather_cache(lat, lng, date_start_str, date_end_str)
+    cached_data = await aget_weather_cache(lat, lng, date_start_str, date_end_str)
     if cached_data:
-        print(f"[ERA5] Cache hit for {lat}, {lng}, {date_start_str} to {date_end_str}")
+        logger.debug("cache hit for %s, %s, %s to %s", lat, lng, date_start_str, date_end_str)
         # Convert dict back to TimeSeriesData objects
-        return [TimeSeriesData(**item) for item in cached_data]
+        # Rows were validated before they were cached, so skip per-field revalidation
+        return [TimeSeriesData.model_construct(**item) for item in cached_data]
     
-    print(f"[ERA5] Cache miss, fetching from API for {lat}, {lng}, {date_start_str} to {date_end_str}")
+    logger.debug("cache miss, fetching from API for %s, %s, %s to %s", lat, lng, date_start_str, date_end_str)
     
     # For MVP, we'll use mock data but structure it for real API integration
     # Real implementation would:
@@ -131,35 +148,20 @@ async def get_weather_data(
                 # 5. Return time series
                 
                 # CDS API는 동기식이므로 asyncio.to_thread()로 실행
-                import asyncio
-                import os
-                import tempfile
-                
-                # Create temporary file for download
-                temp_dir = settings.cache_dir if hasattr(settings, 'cache_dir') else tempfile.gettempdir()
+                # Create temporary files for download
+                temp_dir = CDS_TEMP_DIR
                 os.makedirs(temp_dir, exist_ok=True)
-                temp_file = os.path.join(temp_dir, f"era5_{lat}_{lng}_{start_date.date()}.nc")
+                file_ext = 'grib' if HAS_ECCODES else 'nc'
                 
-                def sync_cds_call():
-                    """Synchronous CDS API call"""
+                def sync_cds_call(sub_start: datetime, sub_end: datetime, temp_file: str):
+                    """Synchronous CDS API call for one sub-period"""
                     try:
                         # Calculate date range for CDS API
                         # CDS API requires year, month, day lists
-                        years = []
-                        months = []
-                        days = []
-                        current = start_date
-                        while current <= end_date:
-                            year = current.year
-                            month = current.month
-                            day = current.day
-                            if year not in years:
-                                years.append(str(year))
-                            if month not in months:
-                                months.append(str(month))
-                            if day not in days:
-                                days.append(str(day))
-                            current += timedelta(days=1)
+                        dr = pd.date_range(sub_start, sub_end, freq='D')
+                        years = [str(y) for y in sorted(dr.year.unique())]
+                        months = [str(m) for m in sorted(dr.month.unique())]
+                        days = [str(d) for d in sorted(dr.day.unique())]
                         
                         # Request ERA5 data
                         client.retrieve(
@@ -177,7 +179,7 @@ async def get_weather_data(
                                     lat - 0.1,  # South
                                     lng + 0.1,  # East
                                 ],
-                                'format': 'netcdf',
+                                'format': 'grib' if HAS_ECCODES else 'netcdf',
                             },
                             temp_file
                         )
@@ -186,164 +188,112 @@ async def get_weather_data(
                         print(f"[ERA5] CDS API retrieve failed: {e}")
                         return None
                 
-                # Run CDS API call in thread pool
-                downloaded_file = await asyncio.to_thread(sync_cds_call)
+                async def download(sub_start: datetime, sub_end: datetime, temp_file: str):
+                    async with cds_semaphore:
+                        return await asyncio.to_thread(sync_cds_call, sub_start, sub_end, temp_file)
                 
-                if downloaded_file and os.path.exists(downloaded_file):
-                    print(f"[ERA5] Downloaded ERA5 data to {downloaded_file}")
+                # One CDS request per calendar year, queued concurrently in the thread pool.
+                # Each call gets its own mkstemp paths so overlapping queries
+                # for the same point never share a download in the shared temp dir, and
+                # every file is removed in finally, whether extraction returns, fails, or
+                # a sibling download raises.
+                sub_ranges = yearly_ranges(start_date, end_date)
+                temp_files = []
+                try:
+                    for sub_start, sub_end in sub_ranges:
+                        fd, temp_file = tempfile.mkstemp(
+                            dir=temp_dir,
+                            prefix=f"era5_{lat}_{lng}_{sub_start.date()}_{sub_end.date()}_",
+                            suffix=f".{file_ext}"
+                        )
+                        os.close(fd)
+                        temp_files.append(temp_file)
                     
-                    # Try to parse NetCDF file
-                    try:
-                        # Try importing xarray first (preferred)
-                        try:
-                            import xarray as xr
-                            HAS_XARRAY = True
-                        except ImportError:
-                            HAS_XARRAY = False
-                            try:
-                                import netCDF4
-                                HAS_NETCDF4 = True
-                            except ImportError:
-                                HAS_NETCDF4 = False
+                    downloaded_files = await asyncio.gather(*[
+                        download(sub_start, sub_end, temp_file)
+                        for (sub_start, sub_end), temp_file in zip(sub_ranges, temp_files)
+                    ], return_exceptions=True)
+                    
+                    if all(isinstance(f, str) and os.path.exists(f) for f in downloaded_files):
+                        print(f"[ERA5] Downloaded ERA5 data to {', '.join(downloaded_files)}")
                         
-                        if HAS_XARRAY:
-                            # Parse with xarray
-                            ds = xr.open_dataset(downloaded_file)
-                            
-                            # Extract temperature data for specific lat/lng
-                            temp_data = ds['t2m']  # 2m temperature variable
-                            
-                            # Select nearest point for each time step
-                            # xarray sel() returns a DataArray with time dimension
-                            point_data = temp_data.sel(
-                                latitude=lat,
-                                longitude=lng,
-                                method='nearest'
-                            )
-                            
-                            # Convert to time series
-                            timeline = []
-                            # point_data is already selected for lat/lng, now iterate over time
-                            # Check dimensions of point_data
-                            if 'time' in point_data.dims:
-                                # Iterate over time dimension
-                                time_coords = point_data.time.values
-                                temp_values = point_data.values
-                                
-                                for time_idx in range(len(time_coords)):
-                                    time_coord = time_coords[time_idx]
-                                    # Get temperature value (handle numpy array)
-                                    if hasattr(temp_values, '__len__') and not isinstance(temp_values, str):
-                                        temp_value = float(temp_values[time_idx])
-                                    else:
-                                        temp_value = float(temp_values)
-                                    
-                                    # Convert from Kelvin to Celsius
-                                    temp_celsius = temp_value - 273.15
-                                    
-                                    # Convert numpy datetime64 to ISO string
-                                    if hasattr(time_coord, 'item'):
-                                        dt = time_coord.item()
-                                    else:
-                                        dt = time_coord
-                                    
-                                    # Convert to ISO string
-                                    if isinstance(dt, str):
-                                        timestamp = dt
-                                    elif hasattr(dt, 'isoformat'):
-                                        timestamp = dt.isoformat()
-                                    else:
-                                        # Convert pandas Timestamp or numpy datetime64
-                                        import pandas as pd
-                                        if isinstance(dt, pd.Timestamp):
-                                            timestamp = dt.isoformat()
-                                        else:
-                                            # numpy datetime64 - convert to string then parse
-                                            timestamp = str(dt)
-                                    
-                                    timeline.append(TimeSeriesData(
-                                        timestamp=timestamp,
-                                        value=round(temp_celsius, 2)
-                                    ))
+                        if HAS_ECCODES:
+                            # GRIB download: one values read per message, no CF decoding
+                            read_point = read_grib_point
+                        elif HAS_XARRAY:
+                            read_point = _read_netcdf_point
+                        else:
+                            read_point = None
+                            if HAS_NETCDF4:
+                                print(f"[ERA5] netCDF4 parsing not fully implemented, using mock data")
                             else:
-                                # Single value (no time dimension) - convert to scalar
-                                try:
-                                    if hasattr(point_data.values, 'item'):
-                                        temp_value = float(point_data.values.item())
-                                    elif hasattr(point_data.values, '__len__') and len(point_data.values) == 1:
-                                        temp_value = float(point_data.values[0])
-                                    else:
-                                        temp_value = float(point_data.values)
-                                except:
-                                    # Fallback: use first value if array
-                                    temp_value = float(point_data.values.flatten()[0])
-                                
-                                temp_celsius = temp_value - 273.15
-                                # Use current time or data time
-                                timeline.append(TimeSeriesData(
-                                    timestamp=datetime.now().isoformat(),
-                                    value=round(temp_celsius, 2)
-                                ))
-                            
-                            ds.close()
-                            
-                            # Clean up temp file
+                                print(f"[ERA5] No NetCDF library available (xarray/netCDF4), using mock data")
+                        
+                        if read_point is not None:
                             try:
-                                os.remove(downloaded_file)
-                            except:
-                                pass
-                            
-                            if timeline:
-                                print(f"[ERA5] Successfully extracted {len(timeline)} data points from ERA5")
-                                return timeline
-                            else:
-                                print(f"[ERA5] No data extracted, using mock data")
-                        elif HAS_NETCDF4:
-                            # Parse with netCDF4 (fallback)
-                            nc = netCDF4.Dataset(downloaded_file, 'r')
-                            # Extract data (implementation similar to xarray)
-                            nc.close()
-                            print(f"[ERA5] netCDF4 parsing not fully implemented, using mock data")
-                        else:
-                            print(f"[ERA5] No NetCDF library available (xarray/netCDF4), using mock data")
-                    except Exception as e:
-                        print(f"[ERA5] Error parsing NetCDF file: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        # Fall through to mock data
-                else:
-                    print(f"[ERA5] CDS API download failed, using mock data")
+                                timestamps = []
+                                raw_parts = []
+                                for downloaded_file in downloaded_files:
+                                    file_timestamps, raw_values = await asyncio.to_thread(read_point, downloaded_file, lat, lng)
+                                    timestamps.extend(file_timestamps)
+                                    raw_parts.append(raw_values)
+                                
+                                # Rows below skip validation, so drop missing cells (NaN from
+                                # NetCDF masking, GRIB missingValue) before converting
+                                raw = np.concatenate(raw_parts)
+                                valid = np.isfinite(raw)
+                                timestamps = [ts for ts, ok in zip(timestamps, valid.tolist()) if ok]
+                                # Kelvin -> Celsius (2 decimals) for the whole series in one kernel call
+                                temps_celsius = k_to_c(raw[valid]).tolist()
+                                # ISO strings and floats built above; skip per-row validation
+                                timeline = [
+                                    TimeSeriesData.model_construct(timestamp=timestamp, value=temp_celsius)
+                                    for timestamp, temp_celsius in zip(timestamps, temps_celsius)
+                                ]
+                                
+                                if timeline:
+                                    print(f"[ERA5] Successfully extracted {len(timeline)} data points from ERA5")
+                                    return timeline
+                                else:
+                                    print(f"[ERA5] No data extracted, using mock data")
+                            except Exception as e:
+                                print(f"[ERA5] Error parsing ERA5 download: {e}")
+                                traceback.print_exc()
+                                # Fall through to mock data
+                    else:
+                        print(f"[ERA5] CDS API download failed, using mock data")
+                finally:
+                    # Clean up temp files
+                    for temp_file in temp_files:
+                        try:
+                            os.remove(temp_file)
+                        except OSError:
+                            pass
                 
             except Exception as e:
                 print(f"[ERA5] CDS API setup failed: {e}")
                 # Fall through to mock data
     
     # Generate mock time series data
-    timeline = []
     current_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
     end_date = end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
     
-    while current_date <= end_date:
-        # Generate realistic temperature values (varies by day)
-        day_of_year = current_date.timetuple().tm_yday
-        # Simple seasonal variation (sine wave approximation)
-        seasonal_factor = (day_of_year / 365.0) * 2 * 3.14159  # Convert to radians
-        base_temp = 15 + 10 * (1 + (seasonal_factor - 1.57) / 1.57)  # Rough seasonal cycle
-        
-        if HAS_NUMPY:
-            temp = base_temp + np.random.random() * 10 - 5
-        else:
-            temp = base_temp + random.random() * 10 - 5
-        
-        timeline.append(TimeSeriesData(
-            timestamp=current_date.isoformat(),
-            value=round(temp, 2)
-        ))
-        
-        current_date += timedelta(days=1)
+    # Whole series as arrays: day-of-year, seasonal base and noise in a few
+    # ufunc calls, timestamps formatted in one pass (keeping any UTC offset)
+    n_days = max(0, (end_date.date() - current_date.date()).days + 1)
+    days = np.datetime64(current_date.date(), 'D') + np.arange(n_days)
+    day_of_year = (days - days.astype('datetime64[Y]')).astype(np.int64) + 1
+    seasonal_factor = (day_of_year / 365.0) * 2 * 3.14159  # Convert to radians
+    base_temp = 15 + 10 * (1 + (seasonal_factor - 1.57) / 1.57)  # Rough seasonal cycle
+    temps = np.round(base_temp + mock_rng(lat, lng, date_start_str).random(n_days) * 10 - 5, 2).tolist()
+    tz_suffix = current_date.isoformat()[19:]
+    timeline = [
+        TimeSeriesData.model_construct(timestamp=ts + tz_suffix, value=temp)
+        for ts, temp in zip(np.datetime_as_string(days, unit='s').tolist(), temps)
+    ]
     
     # Cache mock data too (for consistency)
-    set_weather_cache(lat, lng, date_start_str, date_end_str, timeline)
+    await asyncio.to_thread(set_weather_cache, lat, lng, date_start_str, date_end_str, timeline)
     
     return timeline
 
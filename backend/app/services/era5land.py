@@ -4,11 +4,21 @@ ERA5-Land soil moisture service (Optional for MVP)
 
 from app.config import settings
 from app.api.models import SoilMoistureData
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta, date
-import random
 import os
+import tempfile
 import asyncio
+import traceback
+import numpy as np
+import pandas as pd
+from app.database import aget_soil_moisture_cache, set_soil_moisture_cache
+from app.utils.log_throttle import get_throttled_logger
+from app.utils.reanalysis_kernels import vol_to_pct, cf_times_to_iso, mock_rng, nearest_index, yearly_ranges
+from app.utils.cds import CDS_TEMP_DIR, cds_semaphore, parse_date
+from app.utils.grib_point import HAS_ECCODES, read_grib_point
+
+logger = get_throttled_logger(__name__)
 
 # Try to import cdsapi
 try:
@@ -18,13 +28,6 @@ except ImportError:
     HAS_CDSAPI = False
     print("[ERA5-Land] Warning: cdsapi not installed. Using mock data.")
 
-# Try to import numpy, fallback to random if not available
-try:
-    import numpy as np
-    HAS_NUMPY = True
-except ImportError:
-    HAS_NUMPY = False
-
 # Try to import xarray for NetCDF parsing
 try:
     import xarray as xr
@@ -32,6 +35,51 @@ try:
 except ImportError:
     HAS_XARRAY = False
 
+# Soil moisture variable names, in order of preference
+SOIL_MOISTURE_VARIABLES = ['swvl1', 'volumetric_surface_soil_moisture', 'sm']
+
+
+def _read_netcdf_point(path: str, lat: float, lng: float) -> Tuple[List[str], np.ndarray]:
+    """
+    Soil moisture series (m³/m³) at the grid point nearest (lat, lng) from a CDS NetCDF download
+    
+    Returns:
+        (ISO timestamps, raw values), one entry per time step
+    """
+    # Times are converted in one pass, and nothing is read twice, so skip
+    # xarray's time decoding and caching
+    ds = xr.open_dataset(path, decode_times=False, cache=False)
+    try:
+        # Extract soil moisture data (variable name may vary)
+        soil_var = None
+        for var_name in SOIL_MOISTURE_VARIABLES:
+            if var_name in ds.variables:
+                soil_var = ds[var_name]
+                break
+        
+        if soil_var is None:
+            # Use first data variable
+            for var in ds.variables:
+                if var not in ['time', 'latitude', 'longitude']:
+                    soil_var = ds[var]
+                    break
+        
+        if soil_var is None:
+            raise ValueError("Could not find soil moisture variable")
+        
+        # Nearest grid point by index on the (tiny) bbox axes. Index before
+        # .values: with cache=False the variable stays lazily backed by the
+        # file, so only this point's time series is read from disk
+        lat_idx = nearest_index(ds['latitude'].values, lat)
+        lng_idx = nearest_index(ds['longitude'].values, lng)
+        point_values = soil_var.isel(latitude=lat_idx, longitude=lng_idx).values
+        
+        if 'time' not in soil_var.dims:
+            return [], np.empty(0)
+        return cf_times_to_iso(ds['time'].values, ds['time'].attrs['units']), point_values
+    finally:
+        ds.close()
+
 
 def _setup_cds_client():
     """Setup CDS API client"""
@@ -64,83 +112,43 @@ async def get_soil_moisture(
     Uses actual CDS API to download ERA5-Land soil moisture data
     """
     
-    # Parse dates - use safe parsing to avoid "day is out of range" errors
-    try:
-        if date_end:
-            # Try parsing with timezone first
-            try:
-                end_date = datetime.fromisoformat(date_end.replace('Z', '+00:00'))
-            except:
-                # Try without timezone
-                try:
-                    end_date = datetime.fromisoformat(date_end)
-                except:
-                    # Fallback to now
-                    end_date = datetime.now()
-        else:
-            end_date = datetime.now()
-        
-        if date_start:
-            try:
-                start_date = datetime.fromisoformat(date_start.replace('Z', '+00:00'))
-            except:
-                try:
-                    start_date = datetime.fromisoformat(date_start)
-                except:
-                    start_date = end_date - timedelta(days=30)
-        else:
-            start_date = end_date - timedelta(days=30)
-    except Exception as e:
-        # If anything goes wrong, use safe defaults
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
+    # Parse dates - malformed or out-of-range values fall back to defaults
+    end_date = parse_date(date_end, datetime.now())
+    start_date = parse_date(date_start, end_date - timedelta(days=30))
     
     # Normalize dates to strings for cache lookup
     date_start_str = start_date.strftime('%Y-%m-%d')
     date_end_str = end_date.strftime('%Y-%m-%d')
     
     # Check cache first
-    from app.database import get_soil_moisture_cache, set_soil_moisture_cache
-    cached_data = get_soil_moisture_cache(lat, lng, date_start_str, date_end_str)
+    cached_data = await aget_soil_moisture_cache(lat, lng, date_start_str, date_end_str)
     if cached_data:
-        print(f"[ERA5-Land] Cache hit for {lat}, {lng}, {date_start_str} to {date_end_str}")
+        logger.debug("cache hit for %s, %s, %s to %s", lat, lng, date_start_str, date_end_str)
         # Convert dict back to SoilMoistureData objects
         # Note: SoilMoistureData is already imported at the top of the file
-        return [SoilMoistureData(**item) for item in cached_data]
+        # Rows were validated before they were cached, so skip per-field revalidation
+        return [SoilMoistureData.model_construct(**item) for item in cached_data]
     
-    print(f"[ERA5-Land] Cache miss, fetching from API for {lat}, {lng}, {date_start_str} to {date_end_str}")
+    logger.debug("cache miss, fetching from API for %s, %s, %s to %s", lat, lng, date_start_str, date_end_str)
     
     # Try to use real ERA5-Land data if CDS API is available
     if HAS_CDSAPI and settings.cds_key:
         client = _setup_cds_client()
         if client:
             try:
-                import tempfile
-                
-                # Create temporary file for download
-                temp_dir = settings.cache_dir if hasattr(settings, 'cache_dir') else tempfile.gettempdir()
+                # Create temporary files for download
+                temp_dir = CDS_TEMP_DIR
                 os.makedirs(temp_dir, exist_ok=True)
-                temp_file = os.path.join(temp_dir, f"era5land_soil_{lat}_{lng}_{date_start or 'default'}.nc")
+                file_ext = 'grib' if HAS_ECCODES else 'nc'
                 
-                def sync_cds_call():
-                    """Synchronous CDS API call for ERA5-Land"""
+                def sync_cds_call(sub_start: datetime, sub_end: datetime, temp_file: str):
+                    """Synchronous CDS API call for ERA5-Land, one sub-period"""
                     try:
                         # Calculate date range for CDS API
-                        years = []
-                        months = []
-                        days_list = []
-                        current = start_date
-                        while current <= end_date:
-                            year = current.year
-                            month = current.month
-                            day = current.day
-                            if str(year) not in years:
-                                years.append(str(year))
-                            if str(month) not in months:
-                                months.append(str(month))
-                            if str(day) not in days_list:
-                                days_list.append(str(day))
-                            current += timedelta(days=1)
+                        dr = pd.date_range(sub_start, sub_end, freq='D')
+                        years = [str(y) for y in sorted(dr.year.unique())]
+                        months = [str(m) for m in sorted(dr.month.unique())]
+                        days_list = [str(d) for d in sorted(dr.day.unique())]
                         
                         # Request ERA5-Land soil moisture data
                         # Variable name: 'volumetric_soil_water_layer_1' for layer 1 (0-7cm)
@@ -158,7 +166,7 @@ async def get_soil_moisture(
                                     lat - 0.1,  # South
                                     lng + 0.1,  # East
                                 ],
-                                'format': 'netcdf',
+                                'format': 'grib' if HAS_ECCODES else 'netcdf',
                             },
                             temp_file
                         )
@@ -167,138 +175,113 @@ async def get_soil_moisture(
                         print(f"[ERA5-Land] CDS API retrieve failed: {e}")
                         return None
                 
-                # Run CDS API call in thread pool
-                downloaded_file = await asyncio.to_thread(sync_cds_call)
+                async def download(sub_start: datetime, sub_end: datetime, temp_file: str):
+                    async with cds_semaphore:
+                        return await asyncio.to_thread(sync_cds_call, sub_start, sub_end, temp_file)
                 
-                if downloaded_file and os.path.exists(downloaded_file):
-                    print(f"[ERA5-Land] Downloaded ERA5-Land data to {downloaded_file}")
+                # One CDS request per calendar year, queued concurrently in the thread pool.
+                # Each call gets its own mkstemp paths so overlapping queries
+                # for the same point never share a download in the shared temp dir, and
+                # every file is removed in finally, whether extraction returns, fails, or
+                # a sibling download raises.
+                sub_ranges = yearly_ranges(start_date, end_date)
+                temp_files = []
+                try:
+                    for sub_start, sub_end in sub_ranges:
+                        fd, temp_file = tempfile.mkstemp(
+                            dir=temp_dir,
+                            prefix=f"era5land_soil_{lat}_{lng}_{sub_start.date()}_{sub_end.date()}_",
+                            suffix=f".{file_ext}"
+                        )
+                        os.close(fd)
+                        temp_files.append(temp_file)
                     
-                    # Parse NetCDF file
-                    if HAS_XARRAY:
-                        try:
-                            ds = xr.open_dataset(downloaded_file)
-                            
-                            # Extract soil moisture data (variable name may vary)
-                            soil_var = None
-                            for var_name in ['swvl1', 'volumetric_surface_soil_moisture', 'sm']:
-                                if var_name in ds.variables:
-                                    soil_var = ds[var_name]
-                                    break
-                            
-                            if soil_var is None and len(ds.variables) > 0:
-                                # Use first data variable
-                                for var in ds.variables:
-                                    if var not in ['time', 'latitude', 'longitude']:
-                                        soil_var = ds[var]
-                                        break
-                            
-                            if soil_var is not None:
-                                # Select nearest point
-                                point_data = soil_var.sel(
-                                    latitude=lat,
-                                    longitude=lng,
-                                    method='nearest'
-                                )
-                                
-                                # Convert to time series
-                                timeline = []
-                                if 'time' in point_data.coords:
-                                    time_coords = point_data.coords['time'].values
-                                    soil_values = point_data.values
-                                    
-                                    for time_idx in range(len(time_coords)):
-                                        time_coord = time_coords[time_idx]
-                                        
-                                        # Get soil moisture value
-                                        if hasattr(soil_values, '__len__') and not isinstance(soil_values, str):
-                                            soil_value = float(soil_values[time_idx])
-                                        else:
-                                            soil_value = float(soil_values)
-                                        
-                                        # Convert to percentage (ERA5-Land is in m³/m³, multiply by 100 for %)
-                                        soil_percent = soil_value * 100
-                                        
-                                        # Convert time to ISO string
-                                        if hasattr(time_coord, 'item'):
-                                            dt = time_coord.item()
-                                        else:
-                                            dt = time_coord
-                                        
-                                        if isinstance(dt, str):
-                                            timestamp = dt
-                                        elif hasattr(dt, 'isoformat'):
-                                            timestamp = dt.isoformat()
-                                        else:
-                                            import pandas as pd
-                                            if isinstance(dt, pd.Timestamp):
-                                                timestamp = dt.isoformat()
-                                            else:
-                                                timestamp = str(dt)
-                                        
-                                        timeline.append(SoilMoistureData(
-                                            timestamp=timestamp,
-                                            value=round(soil_percent, 2),
-                                            fieldId=field_id or "field-1",
-                                            depth=7.0  # Layer 1 is 0-7cm
-                                        ))
-                                
-                                ds.close()
+                    downloaded_files = await asyncio.gather(*[
+                        download(sub_start, sub_end, temp_file)
+                        for (sub_start, sub_end), temp_file in zip(sub_ranges, temp_files)
+                    ], return_exceptions=True)
+                    
+                    if all(isinstance(f, str) and os.path.exists(f) for f in downloaded_files):
+                        print(f"[ERA5-Land] Downloaded ERA5-Land data to {', '.join(downloaded_files)}")
+                        
+                        if HAS_ECCODES:
+                            # GRIB download: one values read per message, no CF decoding
+                            read_point = read_grib_point
+                        elif HAS_XARRAY:
+                            read_point = _read_netcdf_point
+                        else:
+                            read_point = None
+                            print(f"[ERA5-Land] xarray not available, using mock data")
+                        
+                        if read_point is not None:
+                            try:
+                                timestamps = []
+                                raw_parts = []
+                                for downloaded_file in downloaded_files:
+                                    file_timestamps, raw_values = await asyncio.to_thread(read_point, downloaded_file, lat, lng)
+                                    timestamps.extend(file_timestamps)
+                                    raw_parts.append(raw_values)
                                 
-                                # Clean up temp file
-                                try:
-                                    os.remove(downloaded_file)
-                                except:
-                                    pass
+                                # Rows below skip validation, so drop missing cells (NaN from
+                                # NetCDF masking, GRIB missingValue) before converting
+                                raw = np.concatenate(raw_parts)
+                                valid = np.isfinite(raw)
+                                timestamps = [ts for ts, ok in zip(timestamps, valid.tolist()) if ok]
+                                # Convert to percentage (ERA5-Land is in m³/m³), 2 decimals, in one kernel call
+                                soil_percents = vol_to_pct(raw[valid]).tolist()
+                                # ISO strings and floats built above; skip per-row validation
+                                timeline = [
+                                    SoilMoistureData.model_construct(
+                                        timestamp=timestamp,
+                                        value=soil_percent,
+                                        fieldId=field_id or "field-1",
+                                        depth=7.0  # Layer 1 is 0-7cm
+                                    )
+                                    for timestamp, soil_percent in zip(timestamps, soil_percents)
+                                ]
                                 
                                 if timeline:
                                     print(f"[ERA5-Land] Successfully extracted {len(timeline)} data points")
                                     # Cache the data
-                                    set_soil_moisture_cache(lat, lng, date_start_str, date_end_str, timeline)
+                                    await asyncio.to_thread(set_soil_moisture_cache, lat, lng, date_start_str, date_end_str, timeline)
                                     return timeline
                                 else:
                                     print(f"[ERA5-Land] No data extracted, using mock data")
-                            else:
-                                print(f"[ERA5-Land] Could not find soil moisture variable, using mock data")
-                                ds.close()
-                        except Exception as e:
-                            print(f"[ERA5-Land] Error parsing NetCDF file: {e}")
-                            import traceback
-                            traceback.print_exc()
+                            except Exception as e:
+                                print(f"[ERA5-Land] Error parsing ERA5-Land download: {e}")
+                                traceback.print_exc()
                     else:
-                        print(f"[ERA5-Land] xarray not available, using mock data")
-                else:
-                    print(f"[ERA5-Land] CDS API download failed, using mock data")
+                        print(f"[ERA5-Land] CDS API download failed, using mock data")
+                finally:
+                    # Clean up temp files
+                    for temp_file in temp_files:
+                        try:
+                            os.remove(temp_file)
+                        except OSError:
+                            pass
             except Exception as e:
                 print(f"[ERA5-Land] CDS API setup failed: {e}")
-                import traceback
                 traceback.print_exc()
     
     # Fallback to mock data if CDS API is not available or failed
     today = date.today()
     days = 30
     
-    timeline = []
-    for i in range(days):
-        data_date = today - timedelta(days=i)
-        
-        if HAS_NUMPY:
-            value = 50 + np.random.random() * 20
-        else:
-            value = 50 + random.random() * 20
-        
-        data_datetime = datetime.combine(data_date, datetime.min.time())
-        
-        timeline.append(SoilMoistureData(
-            timestamp=data_datetime.isoformat(),
-            value=round(value, 2),
+    # Oldest to newest in one pass: values and timestamps as arrays
+    dates = np.datetime64(today, 'D') - np.arange(days - 1, -1, -1)
+    values = np.round(50 + mock_rng(lat, lng, date_start_str).random(days) * 20, 2).tolist()
+    timeline = [
+        SoilMoistureData.model_construct(
+            timestamp=ts,
+            value=value,
             fieldId=field_id or "field-1",
             depth=20.0
-        ))
-    
-    timeline.reverse()
+        )
+        for ts, value in zip(np.datetime_as_string(dates, unit='s').tolist(), values)
+    ]
     
     # Cache mock data too (for consistency)
-    set_soil_moisture_cache(lat, lng, date_start_str, date_end_str, timeline)
+    await asyncio.to_thread(set_soil_moisture_cache, lat, lng, date_start_str, date_end_str, timeline)
     
     return timeline
 
@@ -3,9 +3,94 @@ Shared geometry utility service
 Provides consistent field geometry generation and farm anchor point lookup
 """
 
+import re
+from functools import lru_cache
 from typing import Dict, Any, Tuple, Optional
 
 
+# Farm anchor points (lat, lng)
+FARM_ANCHORS = {
+    "farm-1": (52.619167, -113.092639),  # Hartland Colony, Alberta
+    "farm-2": (54.0167, -124.0167),      # Exceedagro Reference Field, BC
+}
+
+# Field data (single source of truth for field geometry)
+FIELD_DATA = {
+    "field-1": {
+        "farm_id": "farm-1",
+        "crop_id": "crop-1",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[
+                [-113.097639, 52.614167],  # SW
+                [-113.087639, 52.614167],  # SE
+                [-113.087639, 52.624167],  # NE
+                [-113.097639, 52.624167],  # NW
+                [-113.097639, 52.614167]   # Close polygon
+            ]]
+        }
+    },
+    "field-2": {
+        "farm_id": "farm-1",
+        "crop_id": "crop-1",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[
+                [-113.102639, 52.614167],
+                [-113.092639, 52.614167],
+                [-113.092639, 52.624167],
+                [-113.102639, 52.624167],
+                [-113.102639, 52.614167]
+            ]]
+        }
+    },
+    "field-3": {
+        "farm_id": "farm-2",
+        "crop_id": "crop-2",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[
+                [-124.02167, 54.01167],  # SW
+                [-124.01167, 54.01167],  # SE
+                [-124.01167, 54.02167],  # NE
+                [-124.02167, 54.02167],  # NW
+                [-124.02167, 54.01167]   # Close polygon
+            ]]
+        }
+    },
+    "field-4": {
+        "farm_id": "farm-2",
+        "crop_id": "crop-2",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[
+                [-124.02667, 54.01167],
+                [-124.01667, 54.01167],
+                [-124.01667, 54.02167],
+                [-124.02667, 54.02167],
+                [-124.02667, 54.01167]
+            ]]
+        }
+    }
+}
+
+
+def compute_bbox(geometry: Dict[str, Any]) -> Tuple[float, float, float, float]:
+    """
+    Compute the bounding box of a Polygon geometry's outer ring
+    
+    Returns:
+        Tuple of (north, south, east, west) in degrees
+    """
+    # Transpose the ring in C; min/max on plain floats beats np.asarray here
+    lngs, lats = zip(*geometry["coordinates"][0])  # First ring
+    return max(lats), min(lats), max(lngs), min(lngs)
+
+
+# Farm number embedded in fallback field IDs (e.g. "farm-2-north")
+_FARM_ID_RE = re.compile(r'farm-(\d+)')
+
+
 def get_farm_anchor(farm_id: str) -> Tuple[float, float]:
     """
     Get the anchor point (lat, lng) for a farm
@@ -19,15 +104,10 @@ def get_farm_anchor(farm_id: str) -> Tuple[float, float]:
     Raises:
         ValueError: If farm_id is not recognized
     """
-    farm_anchors = {
-        "farm-1": (52.619167, -113.092639),  # Hartland Colony, Alberta
-        "farm-2": (54.0167, -124.0167),      # Exceedagro Reference Field, BC
-    }
-    
-    if farm_id not in farm_anchors:
+    if farm_id not in FARM_ANCHORS:
         raise ValueError(f"Unknown farm_id: {farm_id}")
     
-    lat, lng = farm_anchors[farm_id]
+    lat, lng = FARM_ANCHORS[farm_id]
     return lat, lng
 
 
@@ -70,69 +150,9 @@ def get_field_geometry_by_id(field_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         GeoJSON geometry dict or None if not found
     """
-    # Field data mapping (same structure as fields.py)
-    # This should match the data in fields.py exactly
-    field_data_map = {
-        "field-1": {
-            "farm_id": "farm-1",
-            "crop_id": "crop-1",
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [-113.097639, 52.614167],  # SW
-                    [-113.087639, 52.614167],  # SE
-                    [-113.087639, 52.624167],  # NE
-                    [-113.097639, 52.624167],  # NW
-                    [-113.097639, 52.614167]   # Close polygon
-                ]]
-            }
-        },
-        "field-2": {
-            "farm_id": "farm-1",
-            "crop_id": "crop-1",
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [-113.102639, 52.614167],
-                    [-113.092639, 52.614167],
-                    [-113.092639, 52.624167],
-                    [-113.102639, 52.624167],
-                    [-113.102639, 52.614167]
-                ]]
-            }
-        },
-        "field-3": {
-            "farm_id": "farm-2",
-            "crop_id": "crop-2",
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [-124.02167, 54.01167],  # SW
-                    [-124.01167, 54.01167],  # SE
-                    [-124.01167, 54.02167],  # NE
-                    [-124.02167, 54.02167],  # NW
-                    [-124.02167, 54.01167]   # Close polygon
-                ]]
-            }
-        },
-        "field-4": {
-            "farm_id": "farm-2",
-            "crop_id": "crop-2",
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [-124.02667, 54.01167],
-                    [-124.01667, 54.01167],
-                    [-124.01667, 54.02167],
-                    [-124.02667, 54.02167],
-                    [-124.02667, 54.01167]
-                ]]
-            }
-        }
-    }
-    
-    if field_id in field_data_map:
-        return field_data_map[field_id]["geometry"]
+    field = FIELD_DATA.get(field_id)
+    if field:
+        return field["geometry"]
     
     return None
 
@@ -156,8 +176,7 @@ def get_field_geometry_with_fallback(field_id: str) -> Dict[str, Any]:
         return geometry
     
     # Fallback: extract farm_id from field_id and create estimated polygon
-    import re
-    farm_match = re.search(r'farm-(\d+)', field_id)
+    farm_match = _FARM_ID_RE.search(field_id)
     
     if farm_match:
         farm_num = farm_match.group(1)
@@ -175,3 +194,17 @@ def get_field_geometry_with_fallback(field_id: str) -> Dict[str, Any]:
         lat, lng = get_farm_anchor("farm-1")
         return make_bbox_polygon(lat, lng, delta_deg=0.005)
 
+
+@lru_cache(maxsize=1024)
+def get_field_bbox(field_id: str) -> Tuple[float, float, float, float]:
+    """
+    Get the bounding box of a field's geometry, memoized per field_id
+    
+    Args:
+        field_id: Field ID (e.g., "field-1", "field-2")
+    
+    Returns:
+        Tuple of (north, south, east, west) in degrees, from the same geometry
+        get_field_geometry_with_fallback returns
+    """
+    return compute_bbox(get_field_geometry_with_fallback(field_id))
@@ -168,7 +168,7 @@ async def calculate_kpi_summary(
         
         esg_accuracy = max(70.0, min(100.0, data_quality_score))
         
-        return KPISummary(
+        return KPISummary.model_construct(
             productivityIncrease=round(productivity_increase, 1),
             waterEfficiency=round(water_efficiency, 1),
             esgAccuracy=round(esg_accuracy, 1),
@@ -180,7 +180,7 @@ async def calculate_kpi_summary(
         import traceback
         traceback.print_exc()
         # Return default values on error
-        return KPISummary(
+        return KPISummary.model_construct(
             productivityIncrease=20.0,
             waterEfficiency=25.0,
             esgAccuracy=92.0,
@@ -11,7 +11,8 @@ from datetime import datetime
 def calculate_ndvi_from_bands(
     red_band_path: str,
     nir_band_path: str,
-    field_geometry: Optional[Dict[str, Any]] = None
+    field_geometry: Optional[Dict[str, Any]] = None,
+    precomputed_mask: Optional[np.ndarray] = None
 ) -> Dict[str, Any]:
     """
     Calculate NDVI from Red and NIR band files
@@ -20,9 +21,13 @@ def calculate_ndvi_from_bands(
         red_band_path: Path to Red band (B04) file
         nir_band_path: Path to NIR band (B08) file
         field_geometry: Optional field polygon geometry for masking
+        precomputed_mask: Optional uint8 field mask rasterized over the field
+            bbox in EPSG:4326 (see rasterize_field_mask); when given with
+            field_geometry, the bands are warped onto that same grid and masked
     
     Returns:
-        Dictionary with NDVI statistics and grid data
+        Dictionary with NDVI statistics and grid data ('is_mock' set on the
+        mock fallbacks)
     """
     try:
         # Try to import rasterio for band reading
@@ -37,7 +42,63 @@ def calculate_ndvi_from_bands(
             HAS_RASTERIO = False
             print("[NDVI Calculator] Warning: rasterio/geopandas not installed. Using mock calculation.")
         
-        if HAS_RASTERIO:
+        if HAS_RASTERIO and precomputed_mask is not None and field_geometry:
+            # Warp both bands onto the mask's own grid (field bbox in EPSG:4326
+            # at the mask's shape), so only the field window of the tile is read
+            # and every pixel lines up with the rasterized polygon
+            from rasterio.transform import from_bounds
+            from rasterio.warp import reproject, Resampling
+            
+            west, south, east, north = shape(field_geometry).bounds
+            height, width = precomputed_mask.shape
+            dst_transform = from_bounds(west, south, east, north, width, height)
+            
+            bands = []
+            for band_path in (red_band_path, nir_band_path):
+                with rasterio.open(band_path) as src:
+                    band = np.zeros((height, width), dtype=np.float32)
+                    reproject(
+                        source=rasterio.band(src, 1),
+                        destination=band,
+                        src_nodata=0,
+                        dst_transform=dst_transform,
+                        dst_crs='EPSG:4326',
+                        dst_nodata=0,
+                        resampling=Resampling.average
+                    )
+                    bands.append(band)
+                    resolution = float(src.transform[0])  # Pixel size in meters
+            red_data, nir_data = bands
+            
+            # Calculate NDVI: (NIR - Red) / (NIR + Red), zero outside the field
+            denominator = nir_data + red_data
+            ndvi = np.where(denominator > 0, (nir_data - red_data) / np.where(denominator > 0, denominator, 1.0), 0.0)
+            ndvi_grid = (np.clip(ndvi, -1.0, 1.0) * precomputed_mask).astype(np.float32)
+            
+            valid_ndvi = ndvi_grid[ndvi_grid != 0]
+            if len(valid_ndvi) > 0:
+                mean_ndvi = float(np.mean(valid_ndvi))
+                median_ndvi = float(np.median(valid_ndvi))
+                min_ndvi = float(np.min(valid_ndvi))
+                max_ndvi = float(np.max(valid_ndvi))
+            else:
+                mean_ndvi = median_ndvi = min_ndvi = max_ndvi = 0.0
+            
+            return {
+                'mean': mean_ndvi,
+                'median': median_ndvi,
+                'min': min_ndvi,
+                'max': max_ndvi,
+                'grid': ndvi_grid,
+                'bounds': {
+                    'north': float(north),
+                    'south': float(south),
+                    'east': float(east),
+                    'west': float(west)
+                },
+                'resolution': resolution
+            }
+        elif HAS_RASTERIO:
             # Read Red band
             with rasterio.open(red_band_path) as red_src:
                 red_data = red_src.read(1).astype(np.float32)
@@ -127,8 +188,9 @@ def calculate_ndvi_from_bands(
                 else:
                     ndvi_grid = ndvi
             
-            # Convert to list of lists
-            grid_values = ndvi_grid.tolist()
+            # Keep the grid as a float32 array; the response encoder
+            # (orjson with OPT_SERIALIZE_NUMPY) writes it without a list copy
+            grid_values = np.asarray(ndvi_grid, dtype=np.float32)
             
             return {
                 'mean': mean_ndvi,
@@ -148,11 +210,12 @@ def calculate_ndvi_from_bands(
             # Fallback: Return mock NDVI data
             print("[NDVI Calculator] Using mock NDVI calculation (rasterio not available)")
             return {
+                'is_mock': True,
                 'mean': 0.65,
                 'median': 0.68,
                 'min': 0.2,
                 'max': 0.9,
-                'grid': [[0.2 + np.random.random() * 0.7 for _ in range(64)] for _ in range(64)],
+                'grid': (0.2 + np.random.random((64, 64)) * 0.7).astype(np.float32),
                 'bounds': {
                     'north': 52.624167,
                     'south': 52.614167,
@@ -168,11 +231,12 @@ def calculate_ndvi_from_bands(
         traceback.print_exc()
         # Return mock data on error
         return {
+            'is_mock': True,
             'mean': 0.65,
             'median': 0.68,
             'min': 0.2,
             'max': 0.9,
-            'grid': [[0.2 + np.random.random() * 0.7 for _ in range(20)] for _ in range(20)],
+            'grid': (0.2 + np.random.random((20, 20)) * 0.7).astype(np.float32),
                 'bounds': {
                     'north': 52.624167,  # Hartland Colony, Alberta
                     'south': 52.614167,
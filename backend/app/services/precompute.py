@@ -3,27 +3,107 @@ Precompute service for generating JSON files of KPI, Weather, and Soil data
 Runs in background to pre-calculate data for faster API responses
 """
 
+import asyncio
 import json
 import os
+import time
+import orjson
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from pathlib import Path
+from pydantic import BaseModel
 from app.config import settings
+from app.api.models import api_ok
 from app.services.kpi_calculator import calculate_kpi_summary
 from app.services.era5 import get_weather_data
 from app.services.era5land import get_soil_moisture
 
+# Try to import fcntl (POSIX only), every worker precomputes if not available
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
 
 # Precomputed data directory
 PRECOMPUTE_DIR = os.path.join(settings.cache_dir, "precomputed")
 os.makedirs(PRECOMPUTE_DIR, exist_ok=True)
 
+# Validity of precomputed data per type
+PRECOMPUTE_TTL_HOURS = {
+    "kpi": 24,
+    "weather": 6,
+    "soil": 12,
+    "ndvi_grid": 120,  # Sentinel-2 revisit is ~5 days
+}
+
+# Background KPI precompute queue (created by run_kpi_precompute_worker)
+KPI_QUEUE_MAXSIZE = 1024
+_kpi_queue: Optional[asyncio.Queue] = None
+_kpi_pending: set = set()  # keys queued or in flight
+
+# Strong references to background precompute tasks; the event loop only keeps
+# weak ones, so an unreferenced task can be garbage-collected mid-flight
+_background_tasks: set = set()
+
+# Held open for the life of the worker that won the startup precompute lock
+PRECOMPUTE_LOCK_PATH = os.path.join(PRECOMPUTE_DIR, ".precompute.lock")
+_precompute_lock_file = None
+
+
+def claim_precompute_lock() -> bool:
+    """
+    Try to become the one worker process that runs startup precomputation
+    
+    Takes a non-blocking exclusive flock that the OS releases when this
+    process exits, so a restarted server elects a new owner.
+    """
+    global _precompute_lock_file
+    if not HAS_FCNTL:
+        return True
+    if _precompute_lock_file is not None:
+        return True
+    lock_file = open(PRECOMPUTE_LOCK_PATH, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _precompute_lock_file = lock_file
+    return True
+
+
+def run_in_background(coro) -> asyncio.Task:
+    """Start coro as a task and hold a reference to it until it finishes"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
 
 def get_precompute_path(data_type: str, key: str) -> str:
     """Get file path for precomputed data"""
     return os.path.join(PRECOMPUTE_DIR, f"{data_type}_{key}.json")
 
 
+def kpi_cache_key(farm_id: Optional[str], crop_id: Optional[str], field_id: Optional[str] = None,
+                  lat: Optional[float] = None, lng: Optional[float] = None) -> str:
+    """
+    Build the KPI cache key with a single format call
+    Coordinates are rounded to 1e-4 degrees as integers to skip float formatting;
+    '_' separators keep the key usable as a file name
+    """
+    return (
+        f"{farm_id or '-'}_{crop_id or '-'}_{field_id or '-'}_"
+        f"{round(lat * 10000) if lat is not None else '-'}_{round(lng * 10000) if lng is not None else '-'}"
+    )
+
+
+def get_precompute_response_path(data_type: str, key: str) -> str:
+    """Get file path for the pre-serialized API response envelope"""
+    return os.path.join(PRECOMPUTE_DIR, f"{data_type}_{key}.response.json")
+
+
 async def precompute_kpi(farm_id: str, crop_id: str, field_id: str = None, lat: float = None, lng: float = None) -> Dict[str, Any]:
     """
     Precompute KPI summary for a farm/crop combination
@@ -47,36 +127,78 @@ async def precompute_kpi(farm_id: str, crop_id: str, field_id: str = None, lat:
             lng=lng
         )
         
-        # Create cache key
-        key_parts = [farm_id, crop_id]
-        if field_id:
-            key_parts.append(field_id)
-        if lat and lng:
-            key_parts.append(f"{lat:.4f}_{lng:.4f}")
-        key = "_".join(key_parts)
+        key = kpi_cache_key(farm_id, crop_id, field_id, lat, lng)
         
         # Save to JSON file
         file_path = get_precompute_path("kpi", key)
+        computed_at = datetime.now().isoformat()
+        kpi_dict = kpi_data.model_dump()
         data = {
             "farm_id": farm_id,
             "crop_id": crop_id,
             "field_id": field_id,
             "lat": lat,
             "lng": lng,
-            "data": kpi_data,
-            "computed_at": datetime.now().isoformat(),
-            "ttl_hours": 24  # Valid for 24 hours
+            "data": kpi_dict,
+            "computed_at": computed_at,
+            "ttl_hours": PRECOMPUTE_TTL_HOURS["kpi"]
         }
         
         with open(file_path, 'w') as f:
             json.dump(data, f, indent=2)
         
+        # Also store the ready-to-send response so cache hits are a plain file read
+        store_precomputed_bytes("kpi", key, orjson.dumps(api_ok(kpi_dict, timestamp=computed_at)))
+        
         return data
     except Exception as e:
         print(f"[Precompute] Error computing KPI for {farm_id}/{crop_id}: {e}")
         return None
 
 
+def enqueue_kpi_precompute(farm_id: Optional[str], crop_id: Optional[str], field_id: Optional[str] = None,
+                           lat: Optional[float] = None, lng: Optional[float] = None) -> bool:
+    """
+    Queue a KPI precomputation without blocking
+    Duplicate keys already queued or in flight are dropped, as are requests
+    when the queue is full or the worker isn't running
+    
+    Returns:
+        True if the request was queued
+    """
+    if _kpi_queue is None:
+        return False
+    
+    key = kpi_cache_key(farm_id, crop_id, field_id, lat, lng)
+    if key in _kpi_pending:
+        return False
+    
+    try:
+        _kpi_queue.put_nowait((key, (farm_id, crop_id, field_id, lat, lng)))
+    except asyncio.QueueFull:
+        return False
+    
+    _kpi_pending.add(key)
+    return True
+
+
+async def run_kpi_precompute_worker():
+    """
+    Drain the KPI precompute queue one item at a time
+    Started once at app startup; runs until cancelled
+    """
+    global _kpi_queue
+    _kpi_queue = asyncio.Queue(maxsize=KPI_QUEUE_MAXSIZE)
+    
+    while True:
+        key, args = await _kpi_queue.get()
+        try:
+            await precompute_kpi(*args)
+        finally:
+            _kpi_pending.discard(key)
+            _kpi_queue.task_done()
+
+
 async def precompute_weather(field_id: str, lat: float, lng: float, days: int = 30) -> Dict[str, Any]:
     """
     Precompute weather data for a location
@@ -112,7 +234,7 @@ async def precompute_weather(field_id: str, lat: float, lng: float, days: int =
             "lng": lng,
             "data": weather_data,
             "computed_at": datetime.now().isoformat(),
-            "ttl_hours": 6  # Valid for 6 hours (weather changes frequently)
+            "ttl_hours": PRECOMPUTE_TTL_HOURS["weather"]  # Weather changes frequently
         }
         
         with open(file_path, 'w') as f:
@@ -153,7 +275,10 @@ async def precompute_soil_moisture(field_id: str, lat: float, lng: float, days:
         key = f"{field_id}_{lat:.4f}_{lng:.4f}"
         
         # Convert Pydantic models to dict for JSON serialization
-        soil_data_dict = [item.model_dump() if hasattr(item, 'model_dump') else item.dict() if hasattr(item, 'dict') else item for item in soil_data]
+        if soil_data and isinstance(soil_data[0], BaseModel):
+            soil_data_dict = [item.model_dump() for item in soil_data]
+        else:
+            soil_data_dict = soil_data
         
         # Save to JSON file
         file_path = get_precompute_path("soil", key)
@@ -163,7 +288,7 @@ async def precompute_soil_moisture(field_id: str, lat: float, lng: float, days:
             "lng": lng,
             "data": soil_data_dict,
             "computed_at": datetime.now().isoformat(),
-            "ttl_hours": 12  # Valid for 12 hours
+            "ttl_hours": PRECOMPUTE_TTL_HOURS["soil"]
         }
         
         with open(file_path, 'w') as f:
@@ -211,6 +336,52 @@ def get_precomputed_data(data_type: str, key: str) -> Dict[str, Any] | None:
         return None
 
 
+def store_precomputed_bytes(data_type: str, key: str, body: bytes) -> None:
+    """
+    Store a pre-serialized response envelope for get_precomputed_bytes
+    
+    Args:
+        data_type: Type of data (kpi, ndvi_grid, ...)
+        key: Cache key
+        body: Response body bytes
+    """
+    try:
+        with open(get_precompute_response_path(data_type, key), 'wb') as f:
+            f.write(body)
+    except Exception as e:
+        print(f"[Precompute] Error storing precomputed response: {e}")
+
+
+def get_precomputed_bytes(data_type: str, key: str) -> Optional[bytes]:
+    """
+    Get the pre-serialized response envelope if present and valid
+    TTL is checked against the file mtime, so the body is never parsed
+    
+    Args:
+        data_type: Type of data (kpi, weather, soil)
+        key: Cache key
+    
+    Returns:
+        Response body bytes or None if not found/expired
+    """
+    file_path = get_precompute_response_path(data_type, key)
+    
+    try:
+        age_hours = (time.time() - os.path.getmtime(file_path)) / 3600
+        if age_hours > PRECOMPUTE_TTL_HOURS.get(data_type, 24):
+            # Expired, delete file
+            os.remove(file_path)
+            return None
+        
+        with open(file_path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[Precompute] Error reading precomputed response: {e}")
+        return None
+
+
 async def precompute_all_fields():
     """
     Precompute data for all known fields
@@ -259,5 +430,7 @@ async def precompute_all_fields():
 if __name__ == "__main__":
     # Run precomputation
     import asyncio
+    from app.database import init_db
+    init_db()
     asyncio.run(precompute_all_fields())
 
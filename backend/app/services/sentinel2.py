@@ -4,6 +4,7 @@ Sentinel-2 data processing service
 
 from app.config import settings
 from app.api.models import NDVIGrid, GridData, GridBounds, TimeSeriesData
+from app.services.geometry_service import compute_bbox
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import random
@@ -19,6 +20,7 @@ except ImportError:
 # Try to import numpy, fallback to random if not available
 try:
     import numpy as np
+    from app.utils.reanalysis_kernels import mock_rng
     HAS_NUMPY = True
 except ImportError:
     HAS_NUMPY = False
@@ -28,7 +30,8 @@ async def calculate_ndvi(
     field_id: str,
     geometry: Dict[str, Any],
     date_start: str,
-    date_end: str
+    date_end: str,
+    precomputed_mask: Optional["np.ndarray"] = None
 ) -> NDVIGrid:
     """
     Calculate NDVI for a field polygon and date range
@@ -46,18 +49,15 @@ async def calculate_ndvi(
     - Download multispectral bands (B04=Red, B08=NIR, B02=Blue)
     - Process with rasterio/geopandas
     - Calculate NDVI and EVI
+    
+    precomputed_mask is an optional 64x64 uint8 field mask (see
+    rasterize_field_mask); when given it replaces the polygon masking step.
     """
     # Extract bounds from geometry
-    if geometry.get("type") == "Polygon" and geometry.get("coordinates"):
-        coords = geometry["coordinates"][0]  # First ring
-        lngs = [c[0] for c in coords]
-        lats = [c[1] for c in coords]
-        bounds = GridBounds(
-            north=max(lats),
-            south=min(lats),
-            east=max(lngs),
-            west=min(lngs)
-        )
+    is_polygon = geometry.get("type") == "Polygon" and bool(geometry.get("coordinates"))
+    if is_polygon:
+        north, south, east, west = compute_bbox(geometry)
+        bounds = GridBounds(north=north, south=south, east=east, west=west)
     else:
         # Default bounds
         bounds = GridBounds(
@@ -72,12 +72,9 @@ async def calculate_ndvi(
         try:
             from app.services.sentinel2_search import search_sentinel2_products
             
-            # Extract bounding box from geometry
-            if geometry.get("type") == "Polygon" and geometry.get("coordinates"):
-                coords = geometry["coordinates"][0]  # First ring
-                lngs = [c[0] for c in coords]
-                lats = [c[1] for c in coords]
-                bbox = [min(lngs), min(lats), max(lngs), max(lats)]  # [west, south, east, north]
+            # Bounding box for the search, from the bounds computed above
+            if is_polygon:
+                bbox = [west, south, east, north]
             else:
                 # Default bbox (Hartland Colony, Alberta area)
                 bbox = [-113.102639, 52.614167, -113.087639, 52.624167]
@@ -118,7 +115,8 @@ async def calculate_ndvi(
                                 ndvi_result = calculate_ndvi_from_bands(
                                     red_path,
                                     nir_path,
-                                    field_geometry=geometry
+                                    field_geometry=geometry,
+                                    precomputed_mask=precomputed_mask
                                 )
                                 
                                 # Clean up downloaded product
@@ -129,12 +127,12 @@ async def calculate_ndvi(
                                     pass
                                 
                                 # Return NDVI grid
-                                return NDVIGrid(
+                                ndvi_grid = NDVIGrid.model_construct(
                                     fieldId=field_id,
                                     timestamp=datetime.now().isoformat(),
-                                    grid=GridData(
+                                    grid=GridData.model_construct(
                                         resolution=ndvi_result.get('resolution', 10.0),
-                                        bounds=GridBounds(**ndvi_result.get('bounds', {
+                                        bounds=GridBounds.model_construct(**ndvi_result.get('bounds', {
                                             'north': 52.624167,  # Hartland Colony, Alberta
                                             'south': 52.614167,
                                             'east': -113.087639,
@@ -143,6 +141,8 @@ async def calculate_ndvi(
                                         values=ndvi_result.get('grid', [])
                                     )
                                 )
+                                ndvi_grid._is_mock = ndvi_result.get('is_mock', False)
+                                return ndvi_grid
                             else:
                                 print(f"[Sentinel2] Could not find band files: Red={red_path}, NIR={nir_path}")
                                 # Clean up
@@ -166,23 +166,28 @@ async def calculate_ndvi(
             traceback.print_exc()
             # Fall through to mock data
     
+    # Grids are generated here, so models below skip validation of the 64x64 values
     # Generate mock NDVI grid (values between 0.2 and 0.9)
     # Downsample to 64x64 for MVP
     grid_size = 64
     if HAS_NUMPY:
-        values = [[0.2 + np.random.random() * 0.7 for _ in range(grid_size)] for _ in range(grid_size)]
+        values = (0.2 + np.random.random((grid_size, grid_size)) * 0.7).astype(np.float32)
+        if precomputed_mask is not None:
+            values *= precomputed_mask
     else:
         values = [[0.2 + random.random() * 0.7 for _ in range(grid_size)] for _ in range(grid_size)]
     
-    return NDVIGrid(
+    ndvi_grid = NDVIGrid.model_construct(
         fieldId=field_id,
         timestamp=datetime.now().isoformat(),
-        grid=GridData(
+        grid=GridData.model_construct(
             resolution=10.0,  # 10 meters per pixel (Sentinel-2 resolution)
             bounds=bounds,
             values=values
         )
     )
+    ndvi_grid._is_mock = True
+    return ndvi_grid
 
 
 async def get_ndvi_timeline(
@@ -221,15 +226,17 @@ async def get_ndvi_timeline(
     base_ndvi = 0.6
     day_count = 0
     
+    # Noise seeded per field and start date so repeated requests get the same
+    # series (keeps the carbon/yield ETags stable)
+    seed_parts = (field_id, start_date.strftime('%Y-%m-%d'))
+    rng = mock_rng(*seed_parts) if HAS_NUMPY else random.Random("|".join(seed_parts))
+    
     while current_date <= end_date:
         # Simulate seasonal NDVI variation
         day_of_year = current_date.timetuple().tm_yday
         seasonal_variation = 0.1 * (1 + (day_of_year / 365.0) * 2 - 1)
         
-        if HAS_NUMPY:
-            ndvi_value = base_ndvi + seasonal_variation + np.random.random() * 0.2 - 0.1
-        else:
-            ndvi_value = base_ndvi + seasonal_variation + random.random() * 0.2 - 0.1
+        ndvi_value = base_ndvi + seasonal_variation + rng.random() * 0.2 - 0.1
         
         # Clamp to valid NDVI range
         ndvi_value = max(0.0, min(1.0, ndvi_value))
@@ -3,7 +3,7 @@ Sentinel-2 product download service
 Downloads Sentinel-2 products and extracts bands for NDVI calculation
 """
 
-from app.services.copernicus_auth import get_authenticated_client
+from app.services.copernicus_auth import get_auth_headers, get_http_client
 from typing import Optional, Dict, Any
 import httpx
 import os
@@ -26,10 +26,11 @@ async def download_sentinel2_product(
     Returns:
         Path to downloaded product directory or None if download fails
     """
-    client = await get_authenticated_client()
-    if not client:
+    auth_headers = await get_auth_headers()
+    if not auth_headers:
         print("[Sentinel2 Download] Authentication failed")
         return None
+    client = get_http_client()
     
     try:
         # Construct download URL if not provided
@@ -43,7 +44,7 @@ async def download_sentinel2_product(
         zip_path = os.path.join(temp_dir, f"{product_id}.zip")
         
         # Download the product (this is a large file, may take time)
-        async with client.stream('GET', download_url) as response:
+        async with client.stream('GET', download_url, headers=auth_headers) as response:
             if response.status_code != 200:
                 print(f"[Sentinel2 Download] Download failed: {response.status_code} - {response.text[:200]}")
                 return None
@@ -73,9 +74,6 @@ async def download_sentinel2_product(
         import traceback
         traceback.print_exc()
         return None
-    finally:
-        if client:
-            await client.aclose()
 
 
 async def find_band_files(product_dir: str, band: str) -> Optional[str]:
@@ -2,7 +2,7 @@
 Sentinel-2 product search using Copernicus Data Space OpenSearch API
 """
 
-from app.services.copernicus_auth import get_authenticated_client
+from app.services.copernicus_auth import get_auth_headers, get_http_client
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import httpx
@@ -28,10 +28,11 @@ async def search_sentinel2_products(
     Returns:
         List of product metadata dictionaries
     """
-    client = await get_authenticated_client()
-    if not client:
+    auth_headers = await get_auth_headers()
+    if not auth_headers:
         print("[Sentinel2 Search] Authentication failed")
         return []
+    client = get_http_client()
     
     try:
         # Try multiple API endpoints
@@ -70,7 +71,7 @@ async def search_sentinel2_products(
         print(f"[Sentinel2 Search] Searching products: bbox={bbox}, dates={start_date} to {end_date}")
         print(f"[Sentinel2 Search] Using OData API: {odata_url}")
         
-        response = await client.get(odata_url, params=params)
+        response = await client.get(odata_url, params=params, headers=auth_headers)
         
         print(f"[Sentinel2 Search] Response status: {response.status_code}")
         print(f"[Sentinel2 Search] Response headers: {dict(response.headers)}")
@@ -156,9 +157,6 @@ async def search_sentinel2_products(
         import traceback
         traceback.print_exc()
         return []
-    finally:
-        if client:
-            await client.aclose()
 
 
 async def get_product_download_url(product_id: str) -> Optional[str]:
@@ -171,15 +169,16 @@ async def get_product_download_url(product_id: str) -> Optional[str]:
     Returns:
         Download URL or None
     """
-    client = await get_authenticated_client()
-    if not client:
+    auth_headers = await get_auth_headers()
+    if not auth_headers:
         return None
+    client = get_http_client()
     
     try:
         # Product details endpoint
         product_url = f"https://dataspace.copernicus.eu/api/v1/products/{product_id}"
         
-        response = await client.get(product_url)
+        response = await client.get(product_url, headers=auth_headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -194,7 +193,4 @@ async def get_product_download_url(product_id: str) -> Optional[str]:
     except Exception as e:
         print(f"[Sentinel2 Search] Error getting download URL: {e}")
         return None
-    finally:
-        if client:
-            await client.aclose()
 
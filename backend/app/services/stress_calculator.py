@@ -7,8 +7,11 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from app.services.era5 import get_weather_data
 from app.services.sentinel2 import get_ndvi_timeline
+from app.utils.log_throttle import get_throttled_logger
 import numpy as np
 
+logger = get_throttled_logger(__name__)
+
 
 # Crop-specific stress thresholds
 CROP_THRESHOLDS = {
@@ -159,7 +162,7 @@ async def calculate_stress_grid(
         date_end: End date (YYYY-MM-DD), optional
     
     Returns:
-        Dictionary with grid data (64x64 stress values 0-1)
+        Dictionary with grid data (64x64 float32 array of stress values 0-1)
     """
     try:
         # Get date range
@@ -201,13 +204,13 @@ async def calculate_stress_grid(
             
             # Handle exceptions
             if isinstance(weather_data, Exception):
-                print(f"[Stress Calculator] Weather data error: {weather_data}")
+                logger.warning("stress weather data failed: %s", weather_data)
                 weather_data = []
             if isinstance(ndvi_timeline, Exception):
-                print(f"[Stress Calculator] NDVI timeline error: {ndvi_timeline}")
+                logger.warning("stress NDVI timeline failed: %s", ndvi_timeline)
                 ndvi_timeline = []
         except asyncio.TimeoutError:
-            print("[Stress Calculator] Data fetching timeout, using defaults")
+            logger.warning("stress data fetching timed out, using defaults")
             weather_data = []
             ndvi_timeline = []
         
@@ -261,37 +264,11 @@ async def calculate_stress_grid(
         # Base stress score normalized to 0-1
         base_stress_value = base_stress["stressScore"] / 100.0
         
+        # Add spatial variation to grid (random variation of ±0.2)
         grid_size = 64
-        stress_grid = []
-        
-        try:
-            # Add spatial variation to grid
-            if hasattr(np, 'random'):
-                # Create grid with spatial variation
-                base_array = np.full((grid_size, grid_size), base_stress_value)
-                # Add random variation (±0.2)
-                variation = np.random.random((grid_size, grid_size)) * 0.4 - 0.2
-                stress_array = np.clip(base_array + variation, 0.0, 1.0)
-                stress_grid = stress_array.tolist()
-            else:
-                import random
-                for i in range(grid_size):
-                    row = []
-                    for j in range(grid_size):
-                        variation = random.random() * 0.4 - 0.2
-                        stress_value = max(0.0, min(1.0, base_stress_value + variation))
-                        row.append(round(stress_value, 3))
-                    stress_grid.append(row)
-        except:
-            # Fallback: uniform grid
-            import random
-            for i in range(grid_size):
-                row = []
-                for j in range(grid_size):
-                    variation = random.random() * 0.4 - 0.2
-                    stress_value = max(0.0, min(1.0, base_stress_value + variation))
-                    row.append(round(stress_value, 3))
-                stress_grid.append(row)
+        base_array = np.full((grid_size, grid_size), base_stress_value)
+        variation = np.random.random((grid_size, grid_size)) * 0.4 - 0.2
+        stress_grid = np.clip(base_array + variation, 0.0, 1.0).astype(np.float32)
         
         return {
             "grid": stress_grid,
@@ -301,14 +278,12 @@ async def calculate_stress_grid(
             "components": base_stress["components"]
         }
         
-    except Exception as e:
-        print(f"[Stress Calculator] Error calculating stress grid: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("stress grid calculation failed", extra={"field_id": field_id})
         # Return default low-stress grid
         grid_size = 64
         return {
-            "grid": [[0.2] * grid_size for _ in range(grid_size)],
+            "grid": np.full((grid_size, grid_size), 0.2, dtype=np.float32),
             "stressScore": 20.0,
             "level": "LOW",
             "reasons": ["Calculation error, using default"],
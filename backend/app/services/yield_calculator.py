@@ -7,8 +7,10 @@ from app.api.models import YieldPredictionData
 from app.services.era5 import get_weather_data
 from app.services.era5land import get_soil_moisture
 from app.services.sentinel2 import get_ndvi_timeline
+from app.utils.carbon_kernels import daily_jitter
 from typing import List, Optional
 from datetime import datetime, timedelta
+import numpy as np
 
 
 async def calculate_yield_prediction(
@@ -106,9 +108,18 @@ async def calculate_yield_prediction(
         soil_map = {d.timestamp[:10]: d.value for d in soil_data}
         ndvi_map = {d.timestamp[:10]: d.value for d in ndvi_data}
         
-        while current_date <= end_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            
+        # Lookup keys and ISO timestamps for every day through end_date,
+        # formatted in one NumPy pass each (timestamps keep any UTC offset)
+        n_days = max(0, (end_date.date() - current_date.date()).days + 1)
+        days = np.datetime64(current_date.date(), 'D') + np.arange(n_days)
+        date_keys = days.astype(str).tolist()
+        tz_suffix = current_date.isoformat()[19:]
+        timestamps = [ts + tz_suffix for ts in np.datetime_as_string(days, unit='s').tolist()]
+        
+        # Per-day variation (±2 tons), same per field and day
+        variations = daily_jitter(field_id, days, 2.0).tolist()
+        
+        for date_str, timestamp, variation in zip(date_keys, timestamps, variations):
             # Get data for this date
             temp = weather_map.get(date_str, 15.0)  # Default 15°C
             soil_moisture = soil_map.get(date_str, 50.0)  # Default 50%
@@ -138,8 +149,6 @@ async def calculate_yield_prediction(
             yield_value = base_yield * temp_factor * soil_factor * ndvi_factor
             
             # Add some variation
-            import random
-            variation = random.random() * 4 - 2  # ±2 tons
             yield_value = max(0, yield_value + variation)
             
             # Confidence based on data availability
@@ -153,13 +162,11 @@ async def calculate_yield_prediction(
             confidence = min(0.95, confidence)
             
             timeline.append(YieldPredictionData(
-                timestamp=current_date.isoformat(),
+                timestamp=timestamp,
                 value=round(yield_value, 2),
                 fieldId=field_id,
                 confidence=round(confidence, 3)
             ))
-            
-            current_date += timedelta(days=1)
         
         return timeline
         
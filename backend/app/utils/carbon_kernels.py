@@ -0,0 +1,90 @@
+"""
+Numeric kernels for daily carbon metrics
+Uses a Numba JIT kernel when numba is installed, NumPy otherwise
+"""
+
+import hashlib
+from typing import Tuple
+
+import numpy as np
+
+# Try to import numba, fallback to vectorized NumPy if not available
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _daily_carbon_jit(temp, ndvi, variation, base, emissions, values, is_net):
+        for i in range(temp.shape[0]):
+            ndvi_factor = 0.5 + ndvi[i] * 0.5
+            # Branchless: compiles to a masked blend rather than a jump
+            temp_factor = 0.8 + 0.2 * float(15.0 <= temp[i] <= 25.0)
+            sequestration = max(0.0, base * ndvi_factor * temp_factor + variation[i])
+            net = sequestration - emissions
+            if net > 0.0:
+                values[i] = net
+                is_net[i] = True
+            else:
+                values[i] = sequestration
+                is_net[i] = False
+
+
+def _daily_carbon_numpy(temp, ndvi, variation, base, emissions, values, is_net) -> None:
+    ndvi_factor = 0.5 + ndvi * 0.5
+    in_range = (temp >= 15.0) & (temp <= 25.0)
+    temp_factor = 0.8 + 0.2 * in_range.astype(np.float64)
+    sequestration = np.maximum(0.0, base * ndvi_factor * temp_factor + variation)
+    net = sequestration - emissions
+    is_net[:] = net > 0
+    values[:] = np.where(is_net, net, sequestration)
+
+
+def daily_carbon(
+    temp: np.ndarray,
+    ndvi: np.ndarray,
+    variation: np.ndarray,
+    base_sequestration: float = 2.0,
+    emissions: float = 0.5
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-day carbon value (kg CO2/ha) and whether it is net of emissions
+
+    Sequestration scales base_sequestration by NDVI (0-1 -> 0.5-1.0) and by
+    temperature (1.0 inside 15-25C, 0.8 outside), plus variation, floored at 0.
+    Days where sequestration exceeds emissions report the net value.
+    """
+    temp = np.ascontiguousarray(temp, dtype=np.float64)
+    ndvi = np.ascontiguousarray(ndvi, dtype=np.float64)
+    variation = np.ascontiguousarray(variation, dtype=np.float64)
+    values = np.empty(temp.shape[0], dtype=np.float64)
+    is_net = np.empty(temp.shape[0], dtype=np.bool_)
+    if HAS_NUMBA:
+        _daily_carbon_jit(temp, ndvi, variation, base_sequestration, emissions, values, is_net)
+    else:
+        _daily_carbon_numpy(temp, ndvi, variation, base_sequestration, emissions, values, is_net)
+    return values, is_net
+
+
+def warm_up() -> None:
+    """Compile (or load from the numba cache) the JIT kernel; no-op without numba"""
+    if HAS_NUMBA:
+        daily_carbon(np.zeros(2), np.zeros(2), np.zeros(2))
+
+
+def daily_jitter(key: str, days: np.ndarray, amplitude: float) -> np.ndarray:
+    """
+    Deterministic per-day offsets in [-amplitude, amplitude) for days
+    (datetime64[D]), stable for a given key and day across requests and
+    processes; a vectorized SplitMix64 finalizer replaces RNG draws
+    """
+    seed = np.uint64(int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little"))
+    x = days.astype(np.int64).astype(np.uint64) + seed
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    unit = (x >> np.uint64(11)).astype(np.float64) * 2.0 ** -53  # [0, 1)
+    return (unit * 2.0 - 1.0) * amplitude
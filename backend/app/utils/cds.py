@@ -0,0 +1,29 @@
+"""
+Shared helpers for Copernicus CDS retrievals (ERA5 and ERA5-Land)
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from typing import Optional
+
+from app.config import settings
+
+# CDS queues every request separately; cap how many of ours wait at once,
+# across all datasets, with one process-wide semaphore
+CDS_MAX_CONCURRENT_REQUESTS = 4
+cds_semaphore = asyncio.Semaphore(CDS_MAX_CONCURRENT_REQUESTS)
+
+# Downloads are small and read back once, so keep them on RAM-backed tmpfs
+# where available (Linux) rather than round-tripping through the disk
+CDS_TEMP_DIR = "/dev/shm/cropai" if os.path.isdir("/dev/shm") else settings.cache_dir
+
+
+def parse_date(value: Optional[str], default: datetime) -> datetime:
+    """ISO date/datetime (trailing Z allowed), or default if missing or invalid"""
+    if not value:
+        return default
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return default
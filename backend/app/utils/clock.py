@@ -0,0 +1,44 @@
+"""
+Cached wall-clock timestamp for response envelopes
+A background task refreshes one ISO string every 100ms so handlers don't
+format a datetime on every request
+"""
+
+import asyncio
+from datetime import datetime
+
+REFRESH_INTERVAL = 0.1  # seconds
+
+# Same clock and format as the handlers' datetime.now().isoformat() (local, naive)
+_cached_iso_ts = datetime.now().isoformat()
+
+
+def _refresh() -> None:
+    global _cached_iso_ts
+    _cached_iso_ts = datetime.now().isoformat()
+
+
+def current_timestamp() -> str:
+    """Return the cached ISO timestamp (local time, at most REFRESH_INTERVAL old)"""
+    return _cached_iso_ts
+
+
+async def run_timestamp_refresher() -> None:
+    """Refresh the cached timestamp until cancelled"""
+    while True:
+        _refresh()
+        await asyncio.sleep(REFRESH_INTERVAL)
+
+
+class RequestTimestampMiddleware:
+    """
+    Pure ASGI middleware that stashes the cached timestamp on request.state.ts
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["ts"] = _cached_iso_ts
+        await self.app(scope, receive, send)
@@ -0,0 +1,54 @@
+"""
+Single-point extraction from CDS GRIB downloads
+Reads each message's values straight from eccodes, skipping NetCDF/CF decoding
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+# Try to import eccodes, callers request NetCDF and parse it with xarray if not available
+try:
+    import eccodes
+    HAS_ECCODES = True
+except ImportError:
+    HAS_ECCODES = False
+
+
+def _wrap_lng(lng):
+    """Longitude(s) in [-180, 180), since GRIB grids may use 0-360"""
+    return (lng + 180.0) % 360.0 - 180.0
+
+
+def read_grib_point(path: str, lat: float, lng: float) -> Tuple[List[str], np.ndarray]:
+    """
+    Time series at the grid point nearest (lat, lng) from a single-variable GRIB file
+
+    Returns:
+        (ISO timestamps, raw values in the file's units), one entry per message;
+        missing values are NaN
+    """
+    timestamps = []
+    values = []
+    point_idx = None
+    with open(path, 'rb') as f:
+        while (gid := eccodes.codes_grib_new_from_file(f)) is not None:
+            try:
+                if point_idx is None:
+                    # Every message shares the same small grid, so locate the point once
+                    lats = eccodes.codes_get_array(gid, 'latitudes')
+                    lngs = _wrap_lng(eccodes.codes_get_array(gid, 'longitudes'))
+                    point_idx = int(np.argmin((lats - lat) ** 2 + (lngs - _wrap_lng(lng)) ** 2))
+
+                # Missing cells carry the message's missingValue (9999 by default)
+                value = eccodes.codes_get_values(gid)[point_idx]
+                values.append(np.nan if value == eccodes.codes_get(gid, 'missingValue') else value)
+
+                # validityDate is YYYYMMDD, validityTime is HHMM
+                vdate = eccodes.codes_get(gid, 'validityDate')
+                vtime = eccodes.codes_get(gid, 'validityTime')
+                timestamps.append(f"{vdate // 10000:04d}-{vdate // 100 % 100:02d}-{vdate % 100:02d}T{vtime // 100:02d}:{vtime % 100:02d}:00")
+            finally:
+                eccodes.codes_release(gid)
+
+    return timestamps, np.asarray(values, dtype=np.float64)
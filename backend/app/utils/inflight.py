@@ -0,0 +1,40 @@
+"""
+In-flight request deduplication
+Concurrent cache misses for the same key share one computation
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+async def compute_once(
+    inflight: Dict[str, "asyncio.Future[T]"],
+    key: str,
+    compute: Callable[[], Awaitable[T]]
+) -> T:
+    """
+    Run compute() for key unless a run is already in flight in the given
+    registry, in which case await that run's result instead
+    """
+    future = inflight.get(key)
+    if future is not None:
+        # shield so a disconnecting waiter doesn't cancel the shared run
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    inflight[key] = future
+    try:
+        result = await compute()
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved when nobody else was waiting
+        raise
+    except BaseException:
+        future.cancel()
+        raise
+    finally:
+        inflight.pop(key, None)
+    future.set_result(result)
+    return result
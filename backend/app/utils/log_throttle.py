@@ -0,0 +1,62 @@
+"""
+Rate-limited logging
+Collapses storms of identical exceptions into a sampled log so a degraded
+downstream service doesn't turn every request into a traceback write
+"""
+
+import logging
+import time
+from typing import Dict, Hashable, List
+
+
+class ThrottleFilter(logging.Filter):
+    """
+    Token-bucket filter keyed by exception type + innermost frame
+    (or by message template for records without an exception)
+
+    Each key gets `burst` tokens refilled at `rate` per second; records
+    arriving with an empty bucket are dropped before any handler formats them.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = 10):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[Hashable, List[float]] = {}  # key -> [tokens, last_refill]
+
+    @staticmethod
+    def _key(record: logging.LogRecord) -> Hashable:
+        if record.exc_info and record.exc_info[0] is not None:
+            exc_type, _, tb = record.exc_info
+            while tb is not None and tb.tb_next is not None:
+                tb = tb.tb_next
+            if tb is not None:
+                return (exc_type, tb.tb_frame.f_code.co_filename, tb.tb_lineno)
+            return (exc_type,)
+        return (record.name, record.msg)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = self._key(record)
+        now = time.monotonic()
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [self.burst - 1.0, now]
+            return True
+
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            return False
+
+        bucket[0] = tokens - 1.0
+        return True
+
+
+def get_throttled_logger(name: str, rate: float = 10.0, burst: int = 10) -> logging.Logger:
+    """Return the named logger with a ThrottleFilter attached (idempotent)"""
+    logger = logging.getLogger(name)
+    if not any(isinstance(f, ThrottleFilter) for f in logger.filters):
+        logger.addFilter(ThrottleFilter(rate=rate, burst=burst))
+    return logger
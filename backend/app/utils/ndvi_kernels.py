@@ -0,0 +1,113 @@
+"""
+Numeric kernels for NDVI grid processing
+Uses a Numba JIT kernel when numba is installed, NumPy otherwise
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Try to import numba, fallback to vectorized NumPy if not available
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Try to import rasterio, callers fall back to their own masking if not available
+try:
+    from affine import Affine
+    from rasterio.features import rasterize
+    HAS_RASTERIO = True
+except ImportError:
+    HAS_RASTERIO = False
+
+
+if HAS_NUMBA:
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _block_mean_skip_zero_jit(src, out, step_y, step_x):
+        height, width = out.shape
+        for i in prange(height):
+            for j in range(width):
+                total = 0.0
+                count = 0
+                for y in range(i * step_y, (i + 1) * step_y):
+                    for x in range(j * step_x, (j + 1) * step_x):
+                        v = src[y, x]
+                        if v != 0.0:
+                            total += v
+                            count += 1
+                out[i, j] = total / count if count > 0 else 0.0
+
+
+def _block_mean_skip_zero_numpy(src: np.ndarray, out: np.ndarray, step_y: int, step_x: int) -> None:
+    height, width = out.shape
+    blocks = src.reshape(height, step_y, width, step_x)
+    # Masked zeros add nothing to the sum, so only the count needs the mask;
+    # summing the mask as uint8 into int32 beats count_nonzero's reduction
+    counts = (blocks != 0).view(np.uint8).sum(axis=(1, 3), dtype=np.int32)
+    sums = blocks.sum(axis=(1, 3))
+    out[:] = np.where(counts > 0, sums / np.maximum(counts, 1), 0.0)
+
+
+def block_mean_skip_zero(grid: np.ndarray, target_size: int = 64) -> np.ndarray:
+    """
+    Downsample a 2D grid to target_size x target_size by block averaging,
+    ignoring zero (masked) pixels; blocks with no valid pixels become 0
+
+    Sources smaller than the target on an axis repeat their last row/col.
+    """
+    height, width = grid.shape
+    step_y = max(1, height // target_size)
+    step_x = max(1, width // target_size)
+
+    # Crop to whole blocks, expanding undersized axes by clamped index
+    src = grid[:target_size * step_y, :target_size * step_x]
+    if src.shape[0] < target_size:
+        src = src[np.minimum(np.arange(target_size), src.shape[0] - 1)]
+    if src.shape[1] < target_size:
+        src = src[:, np.minimum(np.arange(target_size), src.shape[1] - 1)]
+
+    out = np.zeros((target_size, target_size), dtype=np.float32)
+    if HAS_NUMBA:
+        _block_mean_skip_zero_jit(src, out, step_y, step_x)
+    else:
+        _block_mean_skip_zero_numpy(src, out, step_y, step_x)
+    return out
+
+
+def warm_up() -> None:
+    """Compile (or load from the numba cache) the JIT kernel; no-op without numba"""
+    if HAS_NUMBA:
+        # Oversized float32 grid, so the crop is a strided view as in real calls
+        block_mean_skip_zero(np.ones((3, 3), dtype=np.float32), target_size=2)
+
+
+def rasterize_field_mask(
+    geometry: Dict[str, Any],
+    north: float,
+    south: float,
+    east: float,
+    west: float,
+    target_size: int = 64
+) -> Optional[np.ndarray]:
+    """
+    Burn a field polygon into a target_size x target_size uint8 mask
+    (1 inside the field, 0 outside) covering the given bounds
+
+    One scanline rasterize call instead of per-pixel point-in-polygon tests.
+    Returns None when rasterio isn't installed.
+    """
+    if not HAS_RASTERIO:
+        return None
+    transform = Affine.translation(west, north) * Affine.scale(
+        (east - west) / target_size, (south - north) / target_size
+    )
+    return rasterize(
+        [(geometry, 1)],
+        out_shape=(target_size, target_size),
+        transform=transform,
+        fill=0,
+        dtype="uint8",
+        all_touched=True
+    )
@@ -0,0 +1,88 @@
+"""
+Numeric kernels for ERA5 / ERA5-Land point series
+Uses a Numba JIT kernel when numba is installed, NumPy otherwise
+"""
+
+import hashlib
+from datetime import datetime
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Try to import numba, fallback to vectorized NumPy if not available
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _scale_round_jit(src, offset, scale, out):
+        for i in range(src.shape[0]):
+            out[i] = np.round((src[i] + offset) * scale * 100.0) / 100.0
+
+
+def _scale_round(arr, offset: float, scale: float) -> np.ndarray:
+    src = np.ascontiguousarray(np.atleast_1d(arr), dtype=np.float64).ravel()
+    if HAS_NUMBA:
+        out = np.empty(src.shape[0], dtype=np.float64)
+        _scale_round_jit(src, offset, scale, out)
+        return out
+    return np.round((src + offset) * scale * 100.0) / 100.0
+
+
+def k_to_c(arr) -> np.ndarray:
+    """Kelvin -> Celsius, rounded to 2 decimals"""
+    return _scale_round(arr, -273.15, 1.0)
+
+
+def vol_to_pct(arr) -> np.ndarray:
+    """Volumetric fraction (m3/m3) -> percent, rounded to 2 decimals"""
+    return _scale_round(arr, 0.0, 100.0)
+
+
+def warm_up() -> None:
+    """Compile (or load from the numba cache) the JIT kernel; no-op without numba"""
+    if HAS_NUMBA:
+        k_to_c(np.zeros(2, dtype=np.float32))
+
+
+def nearest_index(coords, value: float) -> int:
+    """Index of the coordinate closest to value (1-D grid axis)"""
+    return int(np.argmin(np.abs(np.asarray(coords) - value)))
+
+
+def yearly_ranges(start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+    """Split start..end (inclusive) at calendar-year boundaries"""
+    ranges = []
+    while start <= end:
+        year_end = start.replace(month=12, day=31, hour=23, minute=59, second=59, microsecond=999999)
+        ranges.append((start, min(end, year_end)))
+        start = year_end.replace(year=start.year + 1, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    return ranges
+
+
+# CF time units -> pandas to_datetime units
+_CF_TIME_UNITS = {"days": "D", "hours": "h", "minutes": "m", "seconds": "s"}
+
+
+def cf_times_to_iso(values, units: str) -> List[str]:
+    """
+    ISO timestamps for raw CF time offsets (opened with decode_times=False),
+    e.g. units="hours since 1900-01-01 00:00:00.0", converted in one pass
+    """
+    step, _, origin = units.partition(" since ")
+    times = pd.to_datetime(np.atleast_1d(values), unit=_CF_TIME_UNITS[step.strip().lower()], origin=pd.Timestamp(origin.strip()))
+    return times.strftime('%Y-%m-%dT%H:%M:%S').tolist()
+
+
+def mock_rng(*parts) -> np.random.Generator:
+    """
+    PCG64 generator seeded from parts (e.g. lat, lng, start date), so mock
+    series are identical for the same query across requests and processes
+    """
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=8).digest()
+    return np.random.default_rng(int.from_bytes(digest, "little"))
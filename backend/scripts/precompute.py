@@ -16,10 +16,12 @@ import asyncio
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from app.database import init_db
 from app.services.precompute import precompute_all_fields
 
 
 if __name__ == "__main__":
+    init_db()
     print("Starting precomputation...")
     asyncio.run(precompute_all_fields())
     print("Precomputation complete!")
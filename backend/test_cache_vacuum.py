@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Cache cleanup test: expired rows are deleted and their pages vacuumed
+"""
+import os
+import tempfile
+import threading
+import time
+
+from app import database
+
+
+def test_cleanup_vacuums_freed_pages():
+    saved = (database.DB_PATH, database._conn_local, database._db_initialized)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Fresh database file and connection for this test
+            database.DB_PATH = os.path.join(tmp, "cache.db")
+            database._conn_local = threading.local()
+            database._db_initialized = False
+            database.init_db()
+            
+            conn = database.get_db_connection()
+            expired = int(time.time()) - database.CACHE_TTL_SECONDS * 3
+            conn.executemany(
+                "INSERT INTO weather_cache (lat, lng, date_start, date_end, data, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(i, i, "2024-01-01", "2024-01-31", "x" * 4000, expired) for i in range(500)]
+            )
+            conn.commit()
+            
+            database.cleanup_old_cache()
+            assert conn.execute("SELECT COUNT(*) FROM weather_cache").fetchone()[0] == 0
+            
+            # Free more pages outside cleanup, then check that the next cleanup
+            # returns the whole batch rather than a single page
+            conn.executemany(
+                "INSERT INTO weather_cache (lat, lng, date_start, date_end, data, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(i, i, "2024-02-01", "2024-02-29", "x" * 4000, expired) for i in range(500)]
+            )
+            conn.commit()
+            conn.execute("DELETE FROM weather_cache")
+            conn.commit()
+            freed_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            assert 0 < freed_before <= database.VACUUM_PAGES_PER_CLEANUP
+            
+            database.cleanup_old_cache()
+            assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+            
+            conn.close()
+    finally:
+        database.DB_PATH, database._conn_local, database._db_initialized = saved
+
+
+if __name__ == "__main__":
+    test_cleanup_vacuums_freed_pages()
+    print("[OK] cleanup_old_cache vacuums freed pages")
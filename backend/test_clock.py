@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Cached timestamp test: _refresh() moves the value handlers read
+"""
+import time
+
+from app.utils import clock
+
+
+def test_refresh_updates_cached_timestamp():
+    before = clock.current_timestamp()
+    time.sleep(0.01)
+    clock._refresh()
+    after = clock.current_timestamp()
+    assert after != before
+    assert after > before
+
+
+if __name__ == "__main__":
+    test_refresh_updates_cached_timestamp()
+    print("[OK] _refresh updates the cached timestamp")
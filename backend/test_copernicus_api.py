@@ -8,7 +8,7 @@ import sys
 sys.stdout.reconfigure(encoding='utf-8')
 
 from app.config import settings
-from app.services.copernicus_auth import get_access_token, get_authenticated_client
+from app.services.copernicus_auth import get_access_token, get_auth_headers, get_http_client, close_http_client
 
 
 async def test_authentication():
@@ -33,10 +33,11 @@ async def test_odata_endpoint():
     print("Testing OData API Endpoint")
     print("=" * 60)
     
-    client = await get_authenticated_client()
-    if not client:
-        print("❌ Cannot get authenticated client")
+    auth_headers = await get_auth_headers()
+    if not auth_headers:
+        print("❌ Cannot get auth headers")
         return False
+    client = get_http_client()
     
     # Try different OData endpoints
     endpoints = [
@@ -48,7 +49,7 @@ async def test_odata_endpoint():
     for endpoint in endpoints:
         try:
             print(f"\nTrying: {endpoint}")
-            response = await client.get(endpoint, params={"$top": "1", "$format": "json"})
+            response = await client.get(endpoint, params={"$top": "1", "$format": "json"}, headers=auth_headers)
             print(f"Status: {response.status_code}")
             
             if response.status_code == 200:
@@ -64,7 +65,6 @@ async def test_odata_endpoint():
         except Exception as e:
             print(f"❌ Error: {e}")
     
-    await client.aclose()
     return False
 
 
@@ -74,10 +74,11 @@ async def test_stac_endpoint():
     print("Testing STAC API Endpoint")
     print("=" * 60)
     
-    client = await get_authenticated_client()
-    if not client:
-        print("❌ Cannot get authenticated client")
+    auth_headers = await get_auth_headers()
+    if not auth_headers:
+        print("❌ Cannot get auth headers")
         return False
+    client = get_http_client()
     
     # Try STAC endpoints
     endpoints = [
@@ -89,7 +90,7 @@ async def test_stac_endpoint():
     for endpoint in endpoints:
         try:
             print(f"\nTrying: {endpoint}")
-            response = await client.get(endpoint)
+            response = await client.get(endpoint, headers=auth_headers)
             print(f"Status: {response.status_code}")
             
             if response.status_code == 200:
@@ -102,7 +103,6 @@ async def test_stac_endpoint():
         except Exception as e:
             print(f"❌ Error: {e}")
     
-    await client.aclose()
     return False
 
 
@@ -112,10 +112,11 @@ async def test_catalog_endpoint():
     print("Testing Catalog API Endpoint")
     print("=" * 60)
     
-    client = await get_authenticated_client()
-    if not client:
-        print("❌ Cannot get authenticated client")
+    auth_headers = await get_auth_headers()
+    if not auth_headers:
+        print("❌ Cannot get auth headers")
         return False
+    client = get_http_client()
     
     # Try Catalog endpoints
     endpoints = [
@@ -134,7 +135,7 @@ async def test_catalog_endpoint():
                 "limit": 1
             }
             
-            response = await client.post(endpoint, json=search_request)
+            response = await client.post(endpoint, json=search_request, headers=auth_headers)
             print(f"Status: {response.status_code}")
             
             if response.status_code == 200:
@@ -147,7 +148,6 @@ async def test_catalog_endpoint():
         except Exception as e:
             print(f"❌ Error: {e}")
     
-    await client.aclose()
     return False
 
 
@@ -157,10 +157,11 @@ async def test_product_endpoint():
     print("Testing Product API Endpoint")
     print("=" * 60)
     
-    client = await get_authenticated_client()
-    if not client:
-        print("❌ Cannot get authenticated client")
+    auth_headers = await get_auth_headers()
+    if not auth_headers:
+        print("❌ Cannot get auth headers")
         return False
+    client = get_http_client()
     
     # Try Product endpoints
     endpoints = [
@@ -171,7 +172,7 @@ async def test_product_endpoint():
     for endpoint in endpoints:
         try:
             print(f"\nTrying: {endpoint}")
-            response = await client.get(endpoint, params={"limit": "1"})
+            response = await client.get(endpoint, params={"limit": "1"}, headers=auth_headers)
             print(f"Status: {response.status_code}")
             
             if response.status_code == 200:
@@ -184,7 +185,6 @@ async def test_product_endpoint():
         except Exception as e:
             print(f"❌ Error: {e}")
     
-    await client.aclose()
     return False
 
 
@@ -196,19 +196,23 @@ async def main():
     print(f"Client ID: {settings.copernicus_client_id[:20] if settings.copernicus_client_id else 'NOT SET'}...")
     print(f"Client Secret: {'SET' if settings.copernicus_client_secret else 'NOT SET'}")
     
-    # Test authentication first
-    auth_success = await test_authentication()
-    if not auth_success:
-        print("\n❌ Authentication failed. Cannot test other endpoints.")
-        return
-    
-    # Test various endpoints
-    results = {
-        "OData": await test_odata_endpoint(),
-        "STAC": await test_stac_endpoint(),
-        "Catalog": await test_catalog_endpoint(),
-        "Product": await test_product_endpoint(),
-    }
+    try:
+        # Test authentication first
+        auth_success = await test_authentication()
+        if not auth_success:
+            print("\n❌ Authentication failed. Cannot test other endpoints.")
+            return
+        
+        # Test various endpoints
+        results = {
+            "OData": await test_odata_endpoint(),
+            "STAC": await test_stac_endpoint(),
+            "Catalog": await test_catalog_endpoint(),
+            "Product": await test_product_endpoint(),
+        }
+    finally:
+        # The shared client is pooled; close it once at the end
+        await close_http_client()
     
     # Summary
     print("\n" + "=" * 60)
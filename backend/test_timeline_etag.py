@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Timeline ETag test: identical requests get the same ETag, and replaying it
+in If-None-Match returns 304
+"""
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_timeline_etags_are_stable():
+    with TestClient(app) as client:
+        for path in ("/api/carbon-metrics/field-1", "/api/yield-prediction/field-1"):
+            first = client.get(path)
+            second = client.get(path)
+            assert first.status_code == second.status_code == 200
+            etag = first.headers.get("etag")
+            assert etag, f"{path}: no ETag"
+            assert second.headers.get("etag") == etag
+            
+            cached = client.get(path, headers={"If-None-Match": etag})
+            assert cached.status_code == 304
+            assert cached.headers.get("etag") == etag
+
+
+if __name__ == "__main__":
+    test_timeline_etags_are_stable()
+    print("[OK] timeline ETags are stable and honour If-None-Match")